@@ -4,12 +4,15 @@ from django.shortcuts import reverse
 from django.templatetags.static import static
 from django.utils.html import format_html
 from django.utils.http import url_has_allowed_host_and_scheme
-from django.core.exceptions import ObjectDoesNotExist
+from geocoordinates.utils import get_coordinates_many
+from .availability import get_availability_index
 from .models import Product, OrderProduct
 from .models import ProductCategory
 from .models import Restaurant
 from .models import RestaurantMenuItem
 from .models import Order
+from .models import Banner
+from .models import OrderIntake
 
 
 class RestaurantMenuItemInline(admin.TabularInline):
@@ -30,12 +33,32 @@ class RestaurantAdmin(admin.ModelAdmin):
     list_display = [
         'name',
         'address',
+        'get_coordinates',
         'contact_phone',
     ]
     inlines = [
         RestaurantMenuItemInline
     ]
 
+    def get_changelist_instance(self, request):
+        changelist = super().get_changelist_instance(request)
+        restaurants = changelist.result_list
+        coordinates = get_coordinates_many(
+            (restaurant.address for restaurant in restaurants),
+            fetch_missing=False,
+        )
+        for restaurant in restaurants:
+            restaurant.coordinates = coordinates.get(restaurant.address)
+        return changelist
+
+    def get_coordinates(self, obj):
+        coordinates = getattr(obj, 'coordinates', None)
+        if not coordinates:
+            return 'не определены'
+        lat, lon = coordinates
+        return f'{lat}, {lon}'
+    get_coordinates.short_description = 'координаты'
+
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
@@ -114,14 +137,70 @@ class OrderProductInline(admin.TabularInline):  # или admin.StackedInline
     fields = ('product', 'quantity', 'product_price_display')
     readonly_fields = ('product_price_display',)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'product':
+            formfield.choices = list(formfield.choices)
+        return formfield
+
     def product_price_display(self, obj):
-        if obj.product:
+        if obj.product_id:
             return f"{obj.fixed_price} ₽"
         return "-"
 
     product_price_display.short_description = 'Цена товара'
 
 
+@admin.register(Banner)
+class BannerAdmin(admin.ModelAdmin):
+    list_display = [
+        'get_image_list_preview',
+        'title',
+        'position',
+        'is_active',
+        'starts_at',
+        'ends_at',
+    ]
+    list_display_links = [
+        'title',
+    ]
+    list_editable = [
+        'position',
+        'is_active',
+    ]
+    list_filter = [
+        'is_active',
+    ]
+    fields = [
+        'title',
+        'text',
+        'image',
+        'get_image_preview',
+        'position',
+        'is_active',
+        'starts_at',
+        'ends_at',
+    ]
+    readonly_fields = [
+        'get_image_preview',
+    ]
+
+    def get_image_preview(self, obj):
+        if not obj.image:
+            return 'выберите картинку'
+        return format_html('<img src="{url}" style="max-height: 200px;"/>', url=obj.image.url)
+    get_image_preview.short_description = 'превью'
+
+    def get_image_list_preview(self, obj):
+        if not obj.image:
+            return 'нет картинки'
+        return format_html('<img src="{src}" style="max-height: 50px;"/>', src=obj.image.url)
+    get_image_list_preview.short_description = 'превью'
+
+
 @admin.register(ProductCategory)
 class ProductCategoryAdmin(admin.ModelAdmin):
     pass
@@ -129,51 +208,50 @@ class ProductCategoryAdmin(admin.ModelAdmin):
 
 
 
+class TotalPriceFilter(admin.SimpleListFilter):
+    title = 'стоимость заказа'
+    parameter_name = 'total_price'
+    price_ranges = {
+        'lt500': ('до 500 ₽', None, 500),
+        '500-1000': ('от 500 до 1000 ₽', 500, 1000),
+        '1000-2000': ('от 1000 до 2000 ₽', 1000, 2000),
+        'gte2000': ('от 2000 ₽', 2000, None),
+    }
+
+    def lookups(self, request, model_admin):
+        return [(value, label) for value, (label, _, _) in self.price_ranges.items()]
+
+    def queryset(self, request, queryset):
+        if self.value() not in self.price_ranges:
+            return queryset
+        _, min_price, max_price = self.price_ranges[self.value()]
+        if min_price is not None:
+            queryset = queryset.filter(total_price__gte=min_price)
+        if max_price is not None:
+            queryset = queryset.filter(total_price__lt=max_price)
+        return queryset
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    # TODO Доабвить total price
-    list_display = ('id','firstname','lastname','phonenumber','address', 'status', 'comment', 'registered_at', 'called_at', 'delivered_at', 'cooking_restaurant')
-    list_filter = ('status',)
+    list_display = ('id','firstname','lastname','phonenumber','address', 'status', 'total_price', 'comment', 'registered_at', 'called_at', 'delivered_at', 'cooking_restaurant')
+    list_filter = ('status', TotalPriceFilter)
+    readonly_fields = ('total_price',)
     list_editable = ('status',)
+    list_select_related = ('cooking_restaurant',)
     inlines = (OrderProductInline,)
 
-    def formfield_for_foreignkey(self, db_field, request, **kwargs):
-        if db_field.name == "cooking_restaurant":
-            object_id = request.resolver_match.kwargs.get('object_id')
-            if object_id:
-                try:
-                    order = Order.objects.get(id=object_id)
-                    available_restaurants = self.get_available_restaurants(order)
-                    kwargs["queryset"] = available_restaurants
-                except ObjectDoesNotExist:
-                    pass
-        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+    def get_form(self, request, obj=None, change=False, **kwargs):
+        form = super().get_form(request, obj, change, **kwargs)
+        if obj and 'cooking_restaurant' in form.base_fields:
+            form.base_fields['cooking_restaurant'].queryset = self.get_available_restaurants(obj)
+        return form
 
     def get_available_restaurants(self, order):
-        menu_items = RestaurantMenuItem.objects.filter(
-            availability=True
+        restaurant_ids = get_availability_index().get_restaurant_ids(
+            order.order_products.values_list('product_id', flat=True)
         )
-        product_restaurants = {}
-        for item in menu_items:
-            if item.product_id not in product_restaurants:
-                product_restaurants[item.product_id] = []
-            product_restaurants[item.product_id].append(item.restaurant_id)
-
-        available_restaurant_ids = None
-        for order_product in order.order_products.all():
-            product_id = order_product.product_id
-            if product_id in product_restaurants:
-                restaurant_ids = set(product_restaurants[product_id])
-                if available_restaurant_ids is None:
-                    available_restaurant_ids = restaurant_ids
-                else:
-                    available_restaurant_ids = available_restaurant_ids.intersection(restaurant_ids)
-            else:
-                return Restaurant.objects.none()
-            if not available_restaurant_ids:
-                return Restaurant.objects.none()
-        return Restaurant.objects.filter(id__in=available_restaurant_ids)
-
+        return Restaurant.objects.filter(id__in=restaurant_ids)
 
     def save_formset(self, request, form, formset, change):
         instances = formset.save(commit=False)
@@ -182,6 +260,10 @@ class OrderAdmin(admin.ModelAdmin):
                 instance.fixed_price = instance.product.price
         super().save_formset(request, form, formset, change)
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        Order.objects.filter(pk=form.instance.pk).update_total_prices()
+
     def response_change(self, request, obj):
         response = super().response_change(request, obj)
         if '_continue' not in request.POST and '_addanother' not in request.POST and isinstance(response, HttpResponseRedirect):
@@ -196,3 +278,23 @@ class OrderAdmin(admin.ModelAdmin):
 class OrderProductAdmin(admin.ModelAdmin):
     list_display = ('id', 'quantity', 'order', 'product')
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        Order.objects.filter(pk=obj.order_id).update_total_prices()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        Order.objects.filter(pk=obj.order_id).update_total_prices()
+
+    def delete_queryset(self, request, queryset):
+        order_ids = list(queryset.values_list('order_id', flat=True))
+        super().delete_queryset(request, queryset)
+        Order.objects.filter(pk__in=order_ids).update_total_prices()
+
+
+@admin.register(OrderIntake)
+class OrderIntakeAdmin(admin.ModelAdmin):
+    list_display = ('tracking_id', 'status', 'order', 'created_at', 'processed_at')
+    list_filter = ('status',)
+    list_select_related = ('order',)
+    readonly_fields = ('tracking_id', 'order', 'created_at', 'processed_at')
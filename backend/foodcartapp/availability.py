@@ -0,0 +1,103 @@
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from star_burger.versions import bump_version_on_commit, get_version
+
+from .catalog import CATALOG_VERSION
+from .models import Product, Restaurant, RestaurantMenuItem
+
+
+AVAILABILITY_VERSION = 'availability'
+RESTAURANTS_VERSION = 'restaurants'
+
+
+class AvailabilityIndex:
+    def __init__(self, version, product_bitsets):
+        self.version = version
+        self.product_bitsets = product_bitsets
+
+    @classmethod
+    def build(cls, version):
+        product_bitsets = defaultdict(int)
+        menu_items = (
+            RestaurantMenuItem.objects
+            .filter(availability=True)
+            .values_list('product_id', 'restaurant_id')
+        )
+        for product_id, restaurant_id in menu_items:
+            product_bitsets[product_id] |= 1 << restaurant_id
+        return cls(version, dict(product_bitsets))
+
+    def get_restaurants_bitset(self, product_ids):
+        bitset = None
+        for product_id in product_ids:
+            product_bitset = self.product_bitsets.get(product_id, 0)
+            bitset = product_bitset if bitset is None else bitset & product_bitset
+            if not bitset:
+                return 0
+        return bitset or 0
+
+    def get_restaurant_ids(self, product_ids):
+        bitset = self.get_restaurants_bitset(product_ids)
+        restaurant_ids = set()
+        while bitset:
+            lowest_bit = bitset & -bitset
+            restaurant_ids.add(lowest_bit.bit_length() - 1)
+            bitset ^= lowest_bit
+        return restaurant_ids
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_availability_index():
+    global _index
+    version = get_version(AVAILABILITY_VERSION)
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = AvailabilityIndex.build(version)
+        return _index
+
+
+def update_menu_availability(changes):
+    requested = {(product_id, restaurant_id): available for product_id, restaurant_id, available in changes}
+    product_ids = {product_id for product_id, _ in requested}
+    restaurant_ids = {restaurant_id for _, restaurant_id in requested}
+
+    with transaction.atomic():
+        if len(product_ids) != Product.objects.filter(id__in=product_ids).count():
+            raise ValueError('Неизвестный товар')
+        if len(restaurant_ids) != Restaurant.objects.filter(id__in=restaurant_ids).count():
+            raise ValueError('Неизвестный ресторан')
+
+        menu_items = {
+            (item.product_id, item.restaurant_id): item
+            for item in (
+                RestaurantMenuItem.objects
+                .select_for_update()
+                .filter(product_id__in=product_ids, restaurant_id__in=restaurant_ids)
+            )
+        }
+        changed_items, new_items = [], []
+        for (product_id, restaurant_id), available in requested.items():
+            item = menu_items.get((product_id, restaurant_id))
+            if item and item.availability != available:
+                item.availability = available
+                changed_items.append(item)
+            elif not item and available:
+                new_items.append(RestaurantMenuItem(product_id=product_id, restaurant_id=restaurant_id))
+
+        RestaurantMenuItem.objects.bulk_update(changed_items, ['availability'])
+        RestaurantMenuItem.objects.bulk_create(new_items)
+
+        changed_product_ids = {item.product_id for item in changed_items + new_items}
+        if changed_product_ids:
+            Product.objects.filter(id__in=changed_product_ids).update(updated_at=timezone.now())
+            bump_version_on_commit(AVAILABILITY_VERSION)
+            bump_version_on_commit(CATALOG_VERSION)
+
+    return len(changed_items) + len(new_items)
@@ -0,0 +1,44 @@
+import bisect
+import time
+
+from django.core.cache import cache
+
+from star_burger.versions import get_version
+
+from .models import Banner
+
+
+BANNERS_VERSION = 'banners'
+
+
+def serialize_banner(banner):
+    return {
+        'title': banner.title,
+        'src': banner.image.url,
+        'text': banner.text,
+    }
+
+
+def get_banners():
+    return [serialize_banner(banner) for banner in Banner.objects.active()]
+
+
+def get_banners_schedule(version):
+    key = f'banners:{version}:schedule'
+    schedule = cache.get(key)
+    if schedule is None:
+        periods = Banner.objects.filter(is_active=True).values_list('starts_at', 'ends_at')
+        schedule = sorted({
+            moment.timestamp()
+            for period in periods
+            for moment in period
+            if moment
+        })
+        cache.set(key, schedule, timeout=None)
+    return schedule
+
+
+def get_banners_cache_key():
+    version = get_version(BANNERS_VERSION)
+    period = bisect.bisect_right(get_banners_schedule(version), time.time())
+    return f'banners:{version}:{period}'
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import Exists, OuterRef
+
+from star_burger.versions import get_version
+
+from .models import Product, ProductTombstone, RestaurantMenuItem
+from .responses import get_response_variant
+
+
+CATALOG_VERSION = 'catalog'
+CATALOG_SYNC_LAG = timedelta(seconds=5)
+CATALOG_CHANGES_CACHE_TIMEOUT = 5 * 60
+
+
+def serialize_product(product):
+    return {
+        'id': product.id,
+        'name': product.name,
+        'price': product.price,
+        'special_status': product.special_status,
+        'description': product.description,
+        'category': {
+            'id': product.category.id,
+            'name': product.category.name,
+        } if product.category else None,
+        'image': product.image.url,
+        'restaurant': {
+            'id': product.id,
+            'name': product.name,
+        }
+    }
+
+
+def get_catalog():
+    products = Product.objects.select_related('category').available()
+    return [serialize_product(product) for product in products]
+
+
+def get_catalog_etag(request):
+    return f'"{get_version(CATALOG_VERSION)}-{get_response_variant(request)}"'
+
+
+def get_catalog_last_modified(request):
+    return datetime.fromtimestamp(get_version(CATALOG_VERSION), tz=timezone.utc)
+
+
+def make_catalog_cursor(moment):
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def parse_catalog_cursor(cursor):
+    try:
+        return datetime.fromtimestamp(int(cursor) / 1_000_000, tz=timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def get_catalog_sync_cursor(since=None):
+    moment = get_catalog_last_modified(None) - CATALOG_SYNC_LAG
+    if since and since > moment:
+        moment = since
+    return make_catalog_cursor(moment)
+
+
+def get_catalog_changes_cache_key(since=None):
+    return f'catalog-changes:{get_version(CATALOG_VERSION)}:{since and make_catalog_cursor(since)}'
+
+
+def get_catalog_changes_etag(request):
+    since = parse_catalog_cursor(request.GET.get('since'))
+    return f'"{get_version(CATALOG_VERSION)}-{since and make_catalog_cursor(since)}-{get_response_variant(request)}"'
+
+
+def get_catalog_changes(since=None):
+    cursor = get_catalog_sync_cursor(since)
+    if not since:
+        return {
+            'version': cursor,
+            'full': True,
+            'products': get_catalog(),
+            'removed': [],
+        }
+
+    changed_products = (
+        Product.objects
+        .filter(updated_at__gte=since)
+        .select_related('category')
+        .annotate(is_available=Exists(
+            RestaurantMenuItem.objects.filter(product=OuterRef('pk'), availability=True)
+        ))
+        .order_by('id')
+    )
+    products = []
+    removed = []
+    for product in changed_products:
+        if product.is_available:
+            products.append(serialize_product(product))
+        else:
+            removed.append(product.id)
+    removed.extend(
+        ProductTombstone.objects
+        .filter(deleted_at__gte=since)
+        .values_list('product_id', flat=True)
+    )
+
+    return {
+        'version': cursor,
+        'full': False,
+        'products': products,
+        'removed': sorted(set(removed)),
+    }
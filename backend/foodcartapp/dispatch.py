@@ -0,0 +1,112 @@
+import heapq
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Order
+
+
+def get_restaurant_loads():
+    loads = (
+        Order.objects
+        .filter(status=Order.Status.PROCESSING, cooking_restaurant__isnull=False)
+        .values_list('cooking_restaurant')
+        .annotate(orders_count=Count('id'))
+    )
+    return Counter(dict(loads))
+
+
+def rank_candidates(candidates, loads, load_weight=None, max_distance=None):
+    if load_weight is None:
+        load_weight = settings.DISPATCH_LOAD_WEIGHT
+    if max_distance is None:
+        max_distance = settings.DISPATCH_MAX_DISTANCE
+
+    ranked = []
+    for candidate in candidates:
+        restaurant_id = candidate['restaurant'].id
+        distance = candidate['distance']
+        score = None
+        if distance is not None and (not max_distance or distance <= max_distance):
+            score = round(distance + load_weight * loads[restaurant_id], 1)
+        ranked.append({**candidate, 'load': loads[restaurant_id], 'score': score})
+
+    ranked.sort(key=lambda candidate: (
+        candidate['score'] is None,
+        candidate['score'] if candidate['score'] is not None else float('inf'),
+    ))
+    return ranked
+
+
+def suggest_restaurants(orders, loads=None):
+    if loads is None:
+        loads = get_restaurant_loads()
+    for order in orders:
+        order.available_restaurants = rank_candidates(order.available_restaurants, loads)
+        best = order.available_restaurants[0] if order.available_restaurants else None
+        order.suggested_restaurant = best['restaurant'] if best and best['score'] is not None else None
+    return orders
+
+
+def assign_restaurants(orders, loads, load_weight=None, max_distance=None):
+    assignments = []
+    for order in orders:
+        ranked = rank_candidates(order.available_restaurants, loads, load_weight, max_distance)
+        if not ranked or ranked[0]['score'] is None:
+            continue
+        best = ranked[0]
+        loads[best['restaurant'].id] += 1
+        assignments.append((order, best))
+    return assignments
+
+
+def dispatch_orders(batch_size=100, after=None):
+    orders = (
+        Order.objects
+        .select_for_update(skip_locked=True)
+        .filter(status=Order.Status.UNPROCESSED, cooking_restaurant__isnull=True)
+        .order_by('registered_at', 'id')
+    )
+    if after:
+        orders = orders.registered_after(after.registered_at, after.id)
+
+    with transaction.atomic():
+        orders = orders[:batch_size].with_available_restaurants()
+        if not orders:
+            return orders, []
+
+        assignments = assign_restaurants(orders, get_restaurant_loads())
+        updated_at = timezone.now()
+        for order, best in assignments:
+            order.cooking_restaurant = best['restaurant']
+            order.status = Order.Status.PROCESSING
+            order.updated_at = updated_at
+        Order.objects.bulk_update(
+            [order for order, _ in assignments],
+            ['cooking_restaurant', 'status', 'updated_at'],
+        )
+
+    return orders, assignments
+
+
+def simulate_dispatch(orders, cooking_time=timedelta(minutes=30), load_weight=None, max_distance=None):
+    loads = Counter()
+    releases = []
+    for order in orders:
+        while releases and releases[0][0] <= order.registered_at:
+            _, restaurant_id = heapq.heappop(releases)
+            loads[restaurant_id] -= 1
+
+        assignments = assign_restaurants([order], loads, load_weight, max_distance)
+        if not assignments:
+            yield order, None
+            continue
+
+        _, best = assignments[0]
+        finished_at = order.delivered_at or order.registered_at + cooking_time
+        heapq.heappush(releases, (max(finished_at, order.registered_at), best['restaurant'].id))
+        yield order, best
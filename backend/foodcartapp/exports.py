@@ -0,0 +1,79 @@
+import csv
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from .models import Order
+from .responses import dump_json
+
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = [
+    ('order_id', 'id'),
+    ('registered_at', 'registered_at'),
+    ('status', 'status'),
+    ('payment_method', 'payment_method'),
+    ('firstname', 'firstname'),
+    ('lastname', 'lastname'),
+    ('phonenumber', 'phonenumber'),
+    ('address', 'address'),
+    ('cooking_restaurant', 'cooking_restaurant__name'),
+    ('total_price', 'total_price'),
+    ('product_id', 'order_products__product_id'),
+    ('product', 'order_products__product__name'),
+    ('quantity', 'order_products__quantity'),
+    ('fixed_price', 'order_products__fixed_price'),
+]
+EXPORT_HEADER = [name for name, _ in EXPORT_COLUMNS]
+
+
+def get_day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def get_orders_for_export(date_from=None, date_to=None, statuses=None):
+    orders = Order.objects.all()
+    if date_from:
+        orders = orders.filter(registered_at__gte=get_day_start(date_from))
+    if date_to:
+        orders = orders.filter(registered_at__lt=get_day_start(date_to + timedelta(days=1)))
+    if statuses:
+        orders = orders.filter(status__in=statuses)
+    return orders
+
+
+def iter_export_rows(orders, chunk_size=EXPORT_CHUNK_SIZE):
+    rows = (
+        orders
+        .order_by('registered_at', 'id', 'order_products__id')
+        .values_list(*[lookup for _, lookup in EXPORT_COLUMNS])
+    )
+    return rows.iterator(chunk_size=chunk_size)
+
+
+class EchoBuffer:
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(EchoBuffer())
+    yield writer.writerow(EXPORT_HEADER)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_jsonl(rows):
+    for row in rows:
+        record = dict(zip(EXPORT_HEADER, row))
+        record['phonenumber'] = str(record['phonenumber'])
+        yield dump_json(record).decode() + '\n'
+
+
+def iter_export(orders, export_format='csv', chunk_size=EXPORT_CHUNK_SIZE):
+    rows = iter_export_rows(orders, chunk_size=chunk_size)
+    if export_format == 'jsonl':
+        return iter_jsonl(rows)
+    return iter_csv(rows)
@@ -0,0 +1,73 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+def get_request_hash(request):
+    payload = json.dumps(request.data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def replay_response(key, request_hash):
+    record = IdempotencyKey.objects.filter(key=key).first()
+    if not record or record.response_status is None:
+        return Response(
+            {'Idempotency-Key': ['Запрос с этим ключом ещё обрабатывается']},
+            status=status.HTTP_409_CONFLICT,
+        )
+    if record.request_hash != request_hash:
+        return Response(
+            {'Idempotency-Key': ['Ключ уже использован для другого запроса']},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(
+        record.response_body,
+        status=record.response_status,
+        headers={'Idempotent-Replayed': 'true'},
+    )
+
+
+def idempotent(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view(request, *args, **kwargs)
+        if len(key) > IdempotencyKey._meta.get_field('key').max_length:
+            return Response(
+                {'Idempotency-Key': ['Слишком длинный ключ']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        request_hash = get_request_hash(request)
+        IdempotencyKey.objects.filter(
+            key=key,
+            created_at__lt=timezone.now() - settings.IDEMPOTENCY_KEY_TTL,
+        ).delete()
+
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(key=key, request_hash=request_hash)
+            except IntegrityError:
+                return replay_response(key, request_hash)
+
+            response = view(request, *args, **kwargs)
+            if not status.is_success(response.status_code):
+                transaction.set_rollback(True)
+                return response
+
+            record.response_status = response.status_code
+            record.response_body = response.data
+            record.save(update_fields=['response_status', 'response_body'])
+            return response
+
+    return wrapper
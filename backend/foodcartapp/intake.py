@@ -0,0 +1,59 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OrderIntake, Product
+from .orders import create_orders, create_single_order
+from .serializers import OrderSerializer
+
+
+def serialize_intake(intake):
+    return {
+        'tracking_id': str(intake.tracking_id),
+        'status': intake.status,
+        'order_id': intake.order_id,
+        'errors': intake.errors,
+    }
+
+
+def process_order_intake(batch_size=100):
+    with transaction.atomic():
+        intakes = list(
+            OrderIntake.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=OrderIntake.Status.PENDING)
+            .order_by('id')[:batch_size]
+        )
+        if not intakes:
+            return 0
+
+        products = Product.objects.available().in_bulk()
+        accepted_intakes = []
+        validated_orders = []
+        for intake in intakes:
+            serializer = OrderSerializer(data=intake.payload, context={'products': products})
+            if serializer.is_valid():
+                accepted_intakes.append(intake)
+                validated_orders.append(serializer.validated_data)
+            else:
+                intake.status = OrderIntake.Status.REJECTED
+                intake.errors = serializer.errors
+
+        try:
+            orders = create_orders(validated_orders)
+        except Exception:
+            orders = [create_single_order(order_data) for order_data in validated_orders]
+
+        for intake, order in zip(accepted_intakes, orders):
+            if isinstance(order, Exception):
+                intake.status = OrderIntake.Status.REJECTED
+                intake.errors = {'non_field_errors': [str(order)]}
+            else:
+                intake.status = OrderIntake.Status.CONFIRMED
+                intake.order = order
+
+        processed_at = timezone.now()
+        for intake in intakes:
+            intake.processed_at = processed_at
+        OrderIntake.objects.bulk_update(intakes, ['status', 'order', 'errors', 'processed_at'])
+
+    return len(intakes)
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from foodcartapp.dispatch import dispatch_orders
+
+
+class Command(BaseCommand):
+    help = 'Назначает новым заказам ресторан с учётом расстояния, загрузки и наличия товаров'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--interval', type=float, default=10, help='пауза в секундах между проходами')
+        parser.add_argument('--once', action='store_true', help='сделать один проход и завершиться')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            try:
+                processed, assigned = self.dispatch_all(options['batch_size'], options['verbosity'])
+            except Exception as error:
+                self.stderr.write(f'Ошибка назначения ресторанов: {error}')
+                processed, assigned = 0, 0
+
+            if options['once'] or assigned:
+                self.stdout.write(f'Назначено заказов: {assigned}, ждут назначения: {processed - assigned}')
+            if options['once']:
+                return
+            time.sleep(options['interval'])
+
+    def dispatch_all(self, batch_size, verbosity):
+        processed, assigned = 0, 0
+        last_order = None
+        while True:
+            orders, assignments = dispatch_orders(batch_size, after=last_order)
+            if not orders:
+                return processed, assigned
+
+            if verbosity > 1:
+                for order, best in assignments:
+                    self.stdout.write(
+                        f'Заказ {order.id}: {best["restaurant"].name}, '
+                        f'{best["distance"]} км, в работе {best["load"]}'
+                    )
+            processed += len(orders)
+            assigned += len(assignments)
+            last_order = orders[-1]
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from foodcartapp.exports import EXPORT_FORMATS, get_orders_for_export, iter_export
+from foodcartapp.models import Order
+
+
+def date_argument(value):
+    day = parse_date(value)
+    if not day:
+        raise ValueError(value)
+    return day
+
+
+class Command(BaseCommand):
+    help = 'Выгружает заказы вместе с товарами в CSV или JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--from', dest='date_from', type=date_argument, help='дата начала, ГГГГ-ММ-ДД')
+        parser.add_argument('--to', dest='date_to', type=date_argument, help='дата окончания включительно, ГГГГ-ММ-ДД')
+        parser.add_argument('--status', action='append', choices=Order.Status.values, help='можно указать несколько раз')
+        parser.add_argument('--output', help='файл для выгрузки, по умолчанию stdout')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        orders = get_orders_for_export(options['date_from'], options['date_to'], options['status'])
+        chunks = iter_export(orders, options['format'], chunk_size=options['chunk_size'])
+
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            output.writelines(chunks)
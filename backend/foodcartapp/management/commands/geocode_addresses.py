@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Order, Restaurant
+from geocoordinates.utils import get_coordinates_many
+
+
+class Command(BaseCommand):
+    help = 'Определяет координаты адресов заказов и ресторанов, которых ещё нет в базе'
+
+    def handle(self, *args, **options):
+        addresses = set(Restaurant.objects.values_list('address', flat=True))
+        addresses.update(Order.objects.values_list('address', flat=True))
+
+        coordinates = get_coordinates_many(addresses)
+
+        unresolved = [address for address, coords in coordinates.items() if not coords]
+        self.stdout.write(f'Обработано адресов: {len(coordinates)}, без координат: {len(unresolved)}')
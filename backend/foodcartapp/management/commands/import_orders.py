@@ -0,0 +1,131 @@
+import csv
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from foodcartapp.models import Product
+from foodcartapp.orders import create_orders, create_single_order
+from foodcartapp.serializers import OrderSerializer
+
+
+ORDER_FIELDS = ['firstname', 'lastname', 'phonenumber', 'address']
+
+
+def read_jsonl_orders(file):
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as error:
+            yield line_number, error
+
+
+def read_csv_orders(file):
+    reader = csv.DictReader(file)
+    order_key, line_number, payload = None, None, None
+    for row in reader:
+        row_key = row.get('order') or (row.get('phonenumber'), row.get('address'))
+        if payload and row_key != order_key:
+            yield line_number, payload
+            payload = None
+
+        if not payload:
+            order_key, line_number = row_key, reader.line_num
+            payload = {field: row.get(field, '') for field in ORDER_FIELDS}
+            payload['products'] = []
+        payload['products'].append({
+            'product': row.get('product'),
+            'quantity': row.get('quantity'),
+        })
+
+    if payload:
+        yield line_number, payload
+
+
+class Command(BaseCommand):
+    help = 'Импортирует заказы партнёров из файла JSONL или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='путь к файлу с заказами')
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help='по умолчанию определяется по расширению файла')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--rejects', help='файл JSONL для отклонённых заказов')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        readers = {'jsonl': read_jsonl_orders, 'csv': read_csv_orders}
+        if file_format not in readers:
+            raise CommandError('Укажите формат файла: --format jsonl или --format csv')
+
+        products = Product.objects.available().in_bulk()
+        chunk_size = options['chunk_size']
+        try:
+            self.rejects_file = open(options['rejects'], 'w', encoding='utf-8') if options['rejects'] else None
+        except OSError as error:
+            raise CommandError(f'Не удалось открыть {options["rejects"]}: {error}')
+
+        self.imported, self.rejected = 0, 0
+        started_at = time.monotonic()
+        chunk = []
+        try:
+            with open(options['path'], newline='', encoding='utf-8') as file:
+                for line_number, payload in readers[file_format](file):
+                    if isinstance(payload, Exception):
+                        self.reject(line_number, {'non_field_errors': [str(payload)]})
+                    else:
+                        serializer = OrderSerializer(data=payload, context={'products': products})
+                        if serializer.is_valid():
+                            chunk.append((line_number, payload, serializer.validated_data))
+                        else:
+                            self.reject(line_number, serializer.errors, payload)
+
+                    if len(chunk) >= chunk_size:
+                        self.save_chunk(chunk)
+                        chunk = []
+                        self.report(started_at)
+
+                if chunk:
+                    self.save_chunk(chunk)
+        except (OSError, UnicodeDecodeError, csv.Error) as error:
+            raise CommandError(f'Не удалось прочитать {options["path"]}: {error}')
+        finally:
+            if self.rejects_file:
+                self.rejects_file.close()
+
+        self.report(started_at)
+
+    def save_chunk(self, chunk):
+        try:
+            self.imported += len(create_orders([order_data for _, _, order_data in chunk]))
+            return
+        except DatabaseError:
+            pass
+
+        for line_number, payload, order_data in chunk:
+            order = create_single_order(order_data)
+            if isinstance(order, Exception):
+                self.reject(line_number, {'non_field_errors': [str(order)]}, payload)
+            else:
+                self.imported += 1
+
+    def reject(self, line_number, errors, payload=None):
+        self.rejected += 1
+        self.stderr.write(f'Строка {line_number}: {json.dumps(errors, ensure_ascii=False)}')
+        if self.rejects_file:
+            self.rejects_file.write(json.dumps({
+                'line': line_number,
+                'errors': errors,
+                'payload': payload,
+            }, ensure_ascii=False) + '\n')
+
+    def report(self, started_at):
+        elapsed = time.monotonic() - started_at
+        speed = self.imported / elapsed if elapsed else self.imported
+        self.stdout.write(
+            f'Импортировано: {self.imported}, отклонено: {self.rejected}, '
+            f'время: {elapsed:.1f} с, скорость: {speed:.0f} заказов/с'
+        )
@@ -0,0 +1,45 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from foodcartapp.intake import process_order_intake
+
+
+class Command(BaseCommand):
+    help = 'Создаёт заказы из очереди заявок, принятых API в асинхронном режиме'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--interval', type=float, default=1, help='пауза в секундах, когда очередь пуста')
+        parser.add_argument('--once', action='store_true', help='обработать очередь и завершиться')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            processed = 0
+            while count := process_order_intake(options['batch_size']):
+                processed += count
+            self.stdout.write(f'Обработано заявок: {processed}')
+            return
+
+        workers = [
+            threading.Thread(target=self.run_worker, args=(options,), daemon=True)
+            for _ in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    def run_worker(self, options):
+        while True:
+            close_old_connections()
+            try:
+                processed = process_order_intake(options['batch_size'])
+            except Exception as error:
+                self.stderr.write(f'Ошибка обработки очереди заявок: {error}')
+                processed = 0
+            if not processed:
+                time.sleep(options['interval'])
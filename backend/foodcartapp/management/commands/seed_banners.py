@@ -0,0 +1,39 @@
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Banner
+
+
+BANNERS = [
+    ('Burger', 'burger.jpg', 'Tasty Burger at your door step'),
+    ('Spices', 'food.jpg', 'All Cuisines'),
+    ('New York', 'tasty.jpg', 'Food is incomplete without a tasty dessert'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Создаёт стартовые баннеры из картинок в assets, если баннеров ещё нет'
+
+    def handle(self, *args, **options):
+        if Banner.objects.exists():
+            self.stdout.write('Баннеры уже есть, ничего не делаю')
+            return
+
+        created = 0
+        for position, (title, filename, text) in enumerate(BANNERS):
+            path = os.path.join(settings.BASE_DIR, 'assets', filename)
+            if not os.path.exists(path):
+                self.stderr.write(f'Нет картинки {path}')
+                continue
+
+            if not default_storage.exists(filename):
+                with open(path, 'rb') as image:
+                    default_storage.save(filename, File(image))
+            Banner.objects.create(title=title, text=text, position=position, image=filename)
+            created += 1
+
+        self.stdout.write(f'Создано баннеров: {created}')
@@ -0,0 +1,79 @@
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from foodcartapp.dispatch import simulate_dispatch
+from foodcartapp.exports import get_orders_for_export
+from foodcartapp.management.commands.export_orders import date_argument
+
+
+def iter_orders(orders, batch_size):
+    orders = orders.select_related('cooking_restaurant').order_by('registered_at', 'id')
+    last_order = None
+    while True:
+        batch = orders
+        if last_order:
+            batch = batch.registered_after(last_order.registered_at, last_order.id)
+        batch = batch[:batch_size].with_available_restaurants(enqueue_missing=False)
+        if not batch:
+            return
+        yield from batch
+        last_order = batch[-1]
+
+
+class Command(BaseCommand):
+    help = 'Проигрывает назначение ресторанов на исторических заказах без записи в базу'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', type=date_argument, help='дата начала, ГГГГ-ММ-ДД')
+        parser.add_argument('--to', dest='date_to', type=date_argument, help='дата окончания включительно, ГГГГ-ММ-ДД')
+        parser.add_argument('--cooking-minutes', type=int, default=30,
+                            help='сколько ресторан занят заказом, если нет времени доставки')
+        parser.add_argument('--load-weight', type=float, default=settings.DISPATCH_LOAD_WEIGHT,
+                            help='штраф в километрах за каждый заказ в работе')
+        parser.add_argument('--max-distance', type=float, default=settings.DISPATCH_MAX_DISTANCE,
+                            help='максимальное расстояние в километрах, 0 — без ограничения')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        orders = get_orders_for_export(options['date_from'], options['date_to'])
+        results = simulate_dispatch(
+            iter_orders(orders, options['batch_size']),
+            cooking_time=timedelta(minutes=options['cooking_minutes']),
+            load_weight=options['load_weight'],
+            max_distance=options['max_distance'],
+        )
+
+        started_at = time.monotonic()
+        total, matched, historical = 0, 0, 0
+        distances = []
+        restaurants = Counter()
+        peak_loads = Counter()
+        for order, best in results:
+            total += 1
+            if order.cooking_restaurant_id:
+                historical += 1
+            if not best:
+                continue
+            restaurant = best['restaurant']
+            distances.append(best['distance'])
+            restaurants[restaurant.name] += 1
+            peak_loads[restaurant.name] = max(peak_loads[restaurant.name], best['load'] + 1)
+            if order.cooking_restaurant_id == restaurant.id:
+                matched += 1
+        elapsed = time.monotonic() - started_at
+
+        self.stdout.write(f'Заказов: {total}, назначено: {len(distances)}, без ресторана: {total - len(distances)}')
+        if distances:
+            self.stdout.write(
+                f'Расстояние: среднее {sum(distances) / len(distances):.1f} км, '
+                f'максимальное {max(distances):.1f} км'
+            )
+        if historical:
+            self.stdout.write(f'Совпало с назначением менеджера: {matched} из {historical}')
+        for name, count in restaurants.most_common():
+            self.stdout.write(f'  {name}: {count} заказов, пиковая загрузка {peak_loads[name]}')
+        self.stdout.write(f'Время: {elapsed:.1f} с, скорость: {total / elapsed if elapsed else total:.0f} заказов/с')
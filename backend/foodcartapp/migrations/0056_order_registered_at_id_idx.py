@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0055_alter_order_address'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['registered_at', 'id'], name='foodcartapp_registe_a63c12_idx'),
+        ),
+    ]
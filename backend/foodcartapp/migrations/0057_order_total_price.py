@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:00
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def set_total_prices(apps, schema_editor):
+    Order = apps.get_model('foodcartapp', 'Order')
+    OrderProduct = apps.get_model('foodcartapp', 'OrderProduct')
+    order_totals = (
+        OrderProduct.objects
+        .filter(order=OuterRef('pk'))
+        .values('order')
+        .annotate(total=Sum(
+            F('quantity') * F('fixed_price'),
+            output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        ))
+        .values('total')
+    )
+    Order.objects.update(total_price=Coalesce(Subquery(order_totals), Value(Decimal('0'))))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0056_order_registered_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='total_price',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=10, verbose_name='Стоимость заказа'),
+        ),
+        migrations.RunPython(set_total_prices, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:04
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0061_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderIntake',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tracking_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='номер для отслеживания')),
+                ('payload', models.JSONField(verbose_name='данные заказа')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('confirmed', 'Принят'), ('rejected', 'Отклонён')], db_index=True, default='pending', max_length=20, verbose_name='статус')),
+                ('errors', models.JSONField(blank=True, null=True, verbose_name='ошибки')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='дата поступления')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='дата обработки')),
+                ('order', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='intake', to='foodcartapp.order', verbose_name='заказ')),
+            ],
+            options={
+                'verbose_name': 'заявка на заказ',
+                'verbose_name_plural': 'заявки на заказ',
+            },
+        ),
+    ]
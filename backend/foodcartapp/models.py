@@ -1,30 +1,69 @@
+import uuid
 from decimal import Decimal
 
+import numpy as np
+from django.conf import settings
 from django.db import models
 from django.core.validators import MinValueValidator
 from django.db.models.aggregates import Sum
-from django.db.models.expressions import F
+from django.db.models.expressions import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.db.models.query import Prefetch
 from phonenumber_field.modelfields import PhoneNumberField
 from django.utils import timezone
-from geocoordinates.utils import calculate_distance, get_coordinates
+from geocoordinates.tasks import enqueue_address
+from geocoordinates.distance import distance_matrix
+from geocoordinates.utils import get_coordinates_many
+
+
+def get_order_lines_total(lookup_prefix=''):
+    return Sum(
+        F(f'{lookup_prefix}quantity') * F(f'{lookup_prefix}fixed_price'),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+    )
+
 
 class OrderQuerySet(models.QuerySet):
+    def active(self):
+        return self.exclude(status__in=[Order.Status.COMPLETED, Order.Status.CANCELLED])
+
+    def registered_after(self, registered_at, order_id):
+        return self.filter(
+            models.Q(registered_at__gt=registered_at)
+            | models.Q(registered_at=registered_at, id__gt=order_id)
+        )
+
+    def updated_after(self, updated_at, order_id):
+        return self.filter(
+            models.Q(updated_at__gt=updated_at)
+            | models.Q(updated_at=updated_at, id__gt=order_id)
+        )
+
     def with_total_price(self):
         return self.annotate(
-            total_price=Sum(F('order_products__quantity') * F('order_products__product__price'))
+            calculated_total_price=Coalesce(
+                get_order_lines_total('order_products__'),
+                Value(Decimal('0')),
+            )
         )
 
-    def with_available_restaurants(self):
-        menu_items = RestaurantMenuItem.objects.filter(
-            availability=True
-        ).select_related('restaurant')
+    def update_total_prices(self):
+        order_totals = (
+            OrderProduct.objects
+            .filter(order=OuterRef('pk'))
+            .values('order')
+            .annotate(total=get_order_lines_total())
+            .values('total')
+        )
+        return self.update(
+            total_price=Coalesce(Subquery(order_totals), Value(Decimal('0'))),
+            updated_at=timezone.now(),
+        )
 
-        product_restaurants = {}
-        for item in menu_items:
-            if item.product_id not in product_restaurants:
-                product_restaurants[item.product_id] = []
-            product_restaurants[item.product_id].append(item.restaurant)
+    def with_available_restaurants(self, enqueue_missing=True):
+        from .availability import get_availability_index
+
+        availability_index = get_availability_index()
 
         orders = list(self.prefetch_related(
             Prefetch('order_products', queryset=OrderProduct.objects.select_related('product'))
@@ -32,47 +71,62 @@ class OrderQuerySet(models.QuerySet):
 
         all_restaurants = {r.id: r for r in Restaurant.objects.all()}
 
-        restaurant_coords = {}
-        for restaurant in all_restaurants.values():
-            restaurant_coords[restaurant.id] = get_coordinates(restaurant.address)
-
-        for order in orders:
-            available_restaurants = None
-
-            for order_product in order.order_products.all():
-                product_id = order_product.product_id
-
-                if product_id in product_restaurants:
-                    restaurant_set = set(product_restaurants[product_id])
-                    if available_restaurants is None:
-                        available_restaurants = restaurant_set
-                    else:
-                        available_restaurants = available_restaurants.intersection(restaurant_set)
+        addresses = [restaurant.address for restaurant in all_restaurants.values()]
+        addresses.extend(order.address for order in orders)
+        places = get_coordinates_many(addresses, fetch_missing=False, with_status=True)
+        pending_addresses = set()
+        for address, (coords, status) in places.items():
+            if not coords and enqueue_missing:
+                enqueue_address(address)
+            if not status:
+                pending_addresses.add(address)
 
-                if not available_restaurants:
-                    break
+        restaurants = list(all_restaurants.values())
+        restaurant_columns = {restaurant.id: column for column, restaurant in enumerate(restaurants)}
 
-            if available_restaurants:
-                delivery_coords = get_coordinates(order.address)
+        orders_restaurants = []
+        for order in orders:
+            restaurant_ids = availability_index.get_restaurant_ids(
+                order_product.product_id for order_product in order.order_products.all()
+            )
+            orders_restaurants.append([
+                all_restaurants[restaurant_id]
+                for restaurant_id in restaurant_ids
+                if restaurant_id in all_restaurants
+            ])
+
+        mask = np.zeros((len(orders), len(restaurants)), dtype=bool)
+        for row, available_restaurants in enumerate(orders_restaurants):
+            for restaurant in available_restaurants:
+                mask[row, restaurant_columns[restaurant.id]] = True
+
+        distances = distance_matrix(
+            [places.get(order.address, (None, None))[0] for order in orders],
+            [places.get(restaurant.address, (None, None))[0] for restaurant in restaurants],
+            exact_top_k=settings.DISTANCE_EXACT_TOP_K,
+            mask=mask,
+        )
 
-                restaurants_with_distance = []
-                for restaurant in available_restaurants:
-                    rest_coords = restaurant_coords.get(restaurant.id)
-                    dist = calculate_distance(delivery_coords, rest_coords) if delivery_coords and rest_coords else None
+        for row, (order, available_restaurants) in enumerate(zip(orders, orders_restaurants)):
+            restaurants_with_distance = []
+            for restaurant in available_restaurants:
+                dist = distances[row, restaurant_columns[restaurant.id]]
 
-                    restaurants_with_distance.append({
-                        'restaurant': restaurant,
-                        'distance': dist
-                    })
+                restaurants_with_distance.append({
+                    'restaurant': restaurant,
+                    'distance': None if np.isnan(dist) else float(dist),
+                    'pending': (
+                        order.address in pending_addresses
+                        or restaurant.address in pending_addresses
+                    ),
+                })
 
-                restaurants_with_distance.sort(key=lambda x: (
-                    x['distance'] is None,
-                    x['distance'] or float('inf')
-                ))
+            restaurants_with_distance.sort(key=lambda x: (
+                x['distance'] is None,
+                x['distance'] or float('inf')
+            ))
 
-                order.available_restaurants = restaurants_with_distance
-            else:
-                order.available_restaurants = []
+            order.available_restaurants = restaurants_with_distance
 
         return orders
 
@@ -156,6 +210,11 @@ class Product(models.Model):
         max_length=200,
         blank=True,
     )
+    updated_at = models.DateTimeField(
+        'дата изменения',
+        auto_now=True,
+        db_index=True
+    )
 
     objects = ProductQuerySet.as_manager()
 
@@ -167,6 +226,25 @@ class Product(models.Model):
         return self.name
 
 
+class ProductTombstone(models.Model):
+    product_id = models.IntegerField(
+        'id товара',
+        db_index=True
+    )
+    deleted_at = models.DateTimeField(
+        'дата удаления',
+        default=timezone.now,
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'удалённый товар'
+        verbose_name_plural = 'удалённые товары'
+
+    def __str__(self):
+        return f'{self.product_id} ({self.deleted_at})'
+
+
 class RestaurantMenuItem(models.Model):
     restaurant = models.ForeignKey(
         Restaurant,
@@ -281,6 +359,21 @@ class Order(models.Model):
         db_index=True
     )
 
+    total_price = models.DecimalField(
+        'Стоимость заказа',
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        db_index=True
+    )
+
+    updated_at = models.DateTimeField(
+        'Дата и время изменения',
+        auto_now=True,
+        db_index=True
+    )
+
     @property
     def status_label(self):
         return self.get_status_display()
@@ -297,7 +390,8 @@ class Order(models.Model):
         verbose_name_plural = 'Заказы'
 
         indexes = [
-            models.Index(fields=['status'])
+            models.Index(fields=['status']),
+            models.Index(fields=['registered_at', 'id']),
         ]
 
     def __str__(self):
@@ -323,3 +417,146 @@ class OrderProduct(models.Model):
 
     def __str__(self):
         return f"{self.product.name} - {self.quantity}"
+
+
+class BannerQuerySet(models.QuerySet):
+    def active(self, now=None):
+        now = now or timezone.now()
+        return self.filter(
+            models.Q(starts_at__isnull=True) | models.Q(starts_at__lte=now),
+            models.Q(ends_at__isnull=True) | models.Q(ends_at__gt=now),
+            is_active=True,
+        )
+
+
+class Banner(models.Model):
+    title = models.CharField(
+        'заголовок',
+        max_length=50
+    )
+    text = models.CharField(
+        'текст',
+        max_length=200,
+        blank=True,
+    )
+    image = models.ImageField(
+        'картинка'
+    )
+    position = models.PositiveIntegerField(
+        'порядок',
+        default=0,
+        db_index=True
+    )
+    is_active = models.BooleanField(
+        'показывать',
+        default=True,
+        db_index=True
+    )
+    starts_at = models.DateTimeField(
+        'начало показа',
+        null=True,
+        blank=True,
+    )
+    ends_at = models.DateTimeField(
+        'конец показа',
+        null=True,
+        blank=True,
+    )
+
+    objects = BannerQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'баннер'
+        verbose_name_plural = 'баннеры'
+        ordering = ['position', 'id']
+
+    def __str__(self):
+        return self.title
+
+
+class IdempotencyKey(models.Model):
+    key = models.CharField(
+        'ключ',
+        max_length=255,
+        unique=True
+    )
+    request_hash = models.CharField(
+        'хеш запроса',
+        max_length=64
+    )
+    response_status = models.PositiveSmallIntegerField(
+        'код ответа',
+        null=True,
+        blank=True,
+    )
+    response_body = models.JSONField(
+        'тело ответа',
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField(
+        'дата создания',
+        default=timezone.now,
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'ключ идемпотентности'
+        verbose_name_plural = 'ключи идемпотентности'
+
+    def __str__(self):
+        return self.key
+
+
+class OrderIntake(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        CONFIRMED = 'confirmed', 'Принят'
+        REJECTED = 'rejected', 'Отклонён'
+
+    tracking_id = models.UUIDField(
+        'номер для отслеживания',
+        default=uuid.uuid4,
+        unique=True,
+        editable=False
+    )
+    payload = models.JSONField(
+        'данные заказа'
+    )
+    status = models.CharField(
+        'статус',
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+        db_index=True
+    )
+    order = models.OneToOneField(
+        Order,
+        verbose_name='заказ',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='intake'
+    )
+    errors = models.JSONField(
+        'ошибки',
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField(
+        'дата поступления',
+        default=timezone.now,
+        db_index=True
+    )
+    processed_at = models.DateTimeField(
+        'дата обработки',
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'заявка на заказ'
+        verbose_name_plural = 'заявки на заказ'
+
+    def __str__(self):
+        return f'{self.tracking_id} - {self.status}'
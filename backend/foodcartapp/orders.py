@@ -0,0 +1,45 @@
+from django.db import transaction
+
+from geocoordinates.tasks import enqueue_address
+
+from .models import Order, OrderProduct
+
+
+def create_orders(validated_orders):
+    orders = []
+    for order_data in validated_orders:
+        orders.append(Order(
+            firstname=order_data['firstname'],
+            lastname=order_data.get('lastname', '-'),
+            phonenumber=order_data['phonenumber'],
+            address=order_data['address'],
+            total_price=sum(
+                line['product'].price * line['quantity']
+                for line in order_data['products']
+            ),
+        ))
+
+    with transaction.atomic():
+        Order.objects.bulk_create(orders)
+        OrderProduct.objects.bulk_create(
+            OrderProduct(
+                order=order,
+                product=line['product'],
+                quantity=line['quantity'],
+                fixed_price=line['product'].price,
+            )
+            for order, order_data in zip(orders, validated_orders)
+            for line in order_data['products']
+        )
+
+    addresses = {order.address for order in orders}
+    transaction.on_commit(lambda: [enqueue_address(address) for address in addresses])
+    return orders
+
+
+def create_single_order(order_data):
+    try:
+        order, = create_orders([order_data])
+    except Exception as error:
+        return error
+    return order
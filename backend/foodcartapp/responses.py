@@ -0,0 +1,113 @@
+import gzip
+import json
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+MIN_COMPRESSED_LENGTH = 200
+
+django_json_encoder = DjangoJSONEncoder()
+
+
+def encode_json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    return django_json_encoder.default(value)
+
+
+def dump_json(data, pretty=False):
+    if pretty:
+        return json.dumps(data, default=encode_json_value, ensure_ascii=False, indent=4).encode()
+    if orjson:
+        return orjson.dumps(data, default=encode_json_value)
+    return json.dumps(data, default=encode_json_value, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def is_pretty_requested(request):
+    return request.GET.get('pretty', '').lower() in ('1', 'true', 'yes')
+
+
+def parse_accept_encoding(header):
+    qualities = {}
+    for item in header.split(','):
+        coding, *params = item.split(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    return qualities
+
+
+def get_accepted_encoding(request):
+    qualities = parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+
+    def get_quality(encoding):
+        return qualities.get(encoding, qualities.get('*', 0))
+
+    encodings = ['br', 'gzip'] if brotli else ['gzip']
+    encoding = max(encodings, key=get_quality)
+    return encoding if get_quality(encoding) > 0 else None
+
+
+def get_response_variant(request):
+    layout = 'pretty' if is_pretty_requested(request) else 'compact'
+    return f'{layout}-{get_accepted_encoding(request) or "identity"}'
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content)
+    if encoding == 'gzip':
+        return gzip.compress(content, mtime=0)
+    return content
+
+
+def make_json_response(content, encoding=None):
+    response = HttpResponse(content, content_type='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+def render_json(request, data):
+    content = dump_json(data, pretty=is_pretty_requested(request))
+    encoding = get_accepted_encoding(request)
+    if len(content) < MIN_COMPRESSED_LENGTH:
+        encoding = None
+    return compress(content, encoding), encoding
+
+
+def json_response(request, data):
+    return make_json_response(*render_json(request, data))
+
+
+def cached_json_response(request, cache_key, get_data, timeout=None):
+    key = f'{cache_key}:{get_response_variant(request)}'
+    rendered = cache.get(key)
+    if rendered is None:
+        rendered = render_json(request, get_data())
+        cache.set(key, rendered, timeout=timeout)
+    return make_json_response(*rendered)
@@ -1,9 +1,11 @@
 from django.core.validators import MinValueValidator
 from rest_framework import serializers
-from .models import Order,OrderProduct
-from django.db import transaction
+from .models import Order, OrderProduct, Product
+from .orders import create_orders
+from geocoordinates.normalization import clean_address, normalize_address
 
 class OrderProductSerializer(serializers.ModelSerializer):
+    product = serializers.IntegerField()
     quantity = serializers.IntegerField(
         validators=[MinValueValidator(1)]
     )
@@ -28,24 +30,31 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = ['id','firstname', 'lastname', 'phonenumber', 'address', 'products']
 
-    def create(self, validated_data):
-        with transaction.atomic():
-            order = Order.objects.create(
-                firstname=validated_data['firstname'],
-                lastname=validated_data['lastname'],
-                phonenumber=validated_data['phonenumber'],
-                address=validated_data['address'],
-            )
-            order_products = []
-            for product in validated_data['products']:
-                order_product = OrderProduct(
-                    order=order,
-                    product=product['product'],
-                    quantity=product['quantity'],
-                    fixed_price=product['product'].price,
-                )
-                order_products.append(order_product)
-            OrderProduct.objects.bulk_create(order_products)
-            return order
-
+    def validate_products(self, value):
+        products = self.context.get('products')
+        if products is None:
+            product_ids = {item['product'] for item in value}
+            products = Product.objects.available().in_bulk(product_ids)
+
+        errors = [
+            {} if item['product'] in products else {
+                'product': [f'Товар {item["product"]} не найден или недоступен для заказа']
+            }
+            for item in value
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        return [
+            {**item, 'product': products[item['product']]}
+            for item in value
+        ]
+
+    def validate_address(self, value):
+        if not normalize_address(value):
+            raise serializers.ValidationError('Укажите адрес доставки')
+        return clean_address(value)
 
+    def create(self, validated_data):
+        order, = create_orders([validated_data])
+        return order
@@ -0,0 +1,66 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.utils import timezone
+from django.dispatch import receiver
+
+from geocoordinates.tasks import enqueue_address
+from star_burger.versions import bump_version_on_commit
+
+from .availability import AVAILABILITY_VERSION, RESTAURANTS_VERSION
+from .banners import BANNERS_VERSION
+from .catalog import CATALOG_VERSION
+from .models import Banner, Order, Product, ProductCategory, ProductTombstone, Restaurant, RestaurantMenuItem
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_save, sender=Restaurant)
+def geocode_address(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'address' not in update_fields:
+        return
+    address = instance.address
+    transaction.on_commit(lambda: enqueue_address(address))
+
+
+@receiver(post_save, sender=Restaurant)
+@receiver(post_delete, sender=Restaurant)
+def invalidate_restaurants(sender, **kwargs):
+    bump_version_on_commit(RESTAURANTS_VERSION)
+
+
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def invalidate_availability_index(sender, **kwargs):
+    bump_version_on_commit(AVAILABILITY_VERSION)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def invalidate_catalog(sender, **kwargs):
+    bump_version_on_commit(CATALOG_VERSION)
+
+
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+def invalidate_banners(sender, **kwargs):
+    bump_version_on_commit(BANNERS_VERSION)
+
+
+@receiver(post_delete, sender=Product)
+def create_product_tombstone(sender, instance, **kwargs):
+    ProductTombstone.objects.create(product_id=instance.id)
+
+
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def touch_menu_item_product(sender, instance, **kwargs):
+    Product.objects.filter(pk=instance.product_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=ProductCategory)
+@receiver(pre_delete, sender=ProductCategory)
+def touch_category_products(sender, instance, **kwargs):
+    Product.objects.filter(category=instance).update(updated_at=timezone.now())
@@ -0,0 +1,555 @@
+import gzip
+import json
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from geocoordinates.models import PlaceCoordinates
+from geocoordinates.normalization import normalize_address
+
+from .admin import OrderAdmin
+from .dispatch import dispatch_orders
+from .intake import process_order_intake
+from .models import Banner, Order, OrderIntake, OrderProduct, Product, Restaurant, RestaurantMenuItem
+from .orders import create_orders
+from .responses import get_accepted_encoding, json_response
+
+
+class RegisterOrderTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        restaurant = Restaurant.objects.create(name='Star Burger', address='Москва, ул. Ленина, 1')
+        cls.products = [
+            Product.objects.create(name=f'Бургер {number}', price=100 + number, image='burger.jpg')
+            for number in range(10)
+        ]
+        RestaurantMenuItem.objects.bulk_create(
+            RestaurantMenuItem(restaurant=restaurant, product=product)
+            for product in cls.products
+        )
+        cls.unavailable_product = Product.objects.create(name='Салат', price=50, image='salad.jpg')
+
+    def register_order(self, products, **headers):
+        return self.client.post('/api/order/', {
+            'firstname': 'Иван',
+            'lastname': 'Петров',
+            'phonenumber': '+79001234567',
+            'address': 'Москва, ул. Тверская, 5',
+            'products': [{'product': product.id, 'quantity': 2} for product in products],
+        }, content_type='application/json', headers=headers)
+
+    def test_query_count_does_not_depend_on_cart_size(self):
+        for products in (self.products[:1], self.products):
+            with self.subTest(cart_size=len(products)), self.assertNumQueries(5):
+                response = self.register_order(products)
+            self.assertEqual(response.status_code, 201)
+
+        order = Order.objects.latest('id')
+        self.assertEqual(order.order_products.count(), len(self.products))
+        self.assertEqual(order.total_price, sum(product.price * 2 for product in self.products))
+
+    def test_stored_total_matches_annotated_total(self):
+        self.register_order(self.products[:3])
+        order = Order.objects.with_total_price().get()
+        OrderProduct.objects.filter(order=order).update(quantity=5)
+        Order.objects.update_total_prices()
+
+        order = Order.objects.with_total_price().get()
+        self.assertEqual(order.total_price, order.calculated_total_price)
+        self.assertEqual(order.total_price, sum(product.price * 5 for product in self.products[:3]))
+
+    def test_unavailable_products_are_rejected(self):
+        response = self.register_order([self.products[0], self.unavailable_product])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['products'][0], {})
+        self.assertIn('product', response.json()['products'][1])
+        self.assertFalse(Order.objects.exists())
+
+    def test_retries_with_idempotency_key_are_replayed(self):
+        first_response = self.register_order(self.products[:2], idempotency_key='order-1')
+        with CaptureQueriesContext(connection) as queries:
+            second_response = self.register_order(self.products[:2], idempotency_key='order-1')
+        self.assertFalse([query for query in queries if 'foodcartapp_order' in query['sql']])
+
+        self.assertEqual(second_response.status_code, 201)
+        self.assertEqual(second_response.json(), first_response.json())
+        self.assertEqual(second_response.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+
+        other_response = self.register_order(self.products[:1], idempotency_key='order-1')
+        self.assertEqual(other_response.status_code, 422)
+
+
+class DispatchOrdersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(name='Бургер', price=100, image='burger.jpg')
+        cls.near = Restaurant.objects.create(name='Рядом', address='Москва, Тверская улица, 1')
+        cls.far = Restaurant.objects.create(name='Подальше', address='Москва, Тверская улица, 30')
+        for restaurant in (cls.near, cls.far):
+            RestaurantMenuItem.objects.create(restaurant=restaurant, product=cls.product)
+
+        places = {
+            cls.near.address: (55.757, 37.613),
+            cls.far.address: (55.770, 37.596),
+            'Москва, Тверская улица, 10': (55.760, 37.609),
+        }
+        PlaceCoordinates.objects.bulk_create(
+            PlaceCoordinates(address=normalize_address(address), lat=lat, lon=lon)
+            for address, (lat, lon) in places.items()
+        )
+
+    def create_order(self, **fields):
+        order = Order.objects.create(
+            firstname='Иван',
+            phonenumber='+79001234567',
+            address='Москва, Тверская улица, 10',
+            **fields,
+        )
+        OrderProduct.objects.create(order=order, product=self.product, quantity=1, fixed_price=100)
+        return order
+
+    def test_nearest_restaurant_is_assigned(self):
+        order = self.create_order()
+
+        _, assignments = dispatch_orders()
+
+        self.assertEqual(len(assignments), 1)
+        order.refresh_from_db()
+        self.assertEqual(order.cooking_restaurant, self.near)
+        self.assertEqual(order.status, Order.Status.PROCESSING)
+
+    def test_busy_restaurant_is_avoided(self):
+        for _ in range(5):
+            self.create_order(cooking_restaurant=self.near, status=Order.Status.PROCESSING)
+        order = self.create_order()
+
+        dispatch_orders()
+
+        order.refresh_from_db()
+        self.assertEqual(order.cooking_restaurant, self.far)
+
+
+class OrderAdminQueriesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='password')
+        cls.restaurants = [
+            Restaurant.objects.create(name=f'Ресторан {number}', address=f'Москва, ул. Ленина, {number}')
+            for number in range(3)
+        ]
+        cls.products = [
+            Product.objects.create(name=f'Бургер {number}', price=100, image='burger.jpg')
+            for number in range(10)
+        ]
+        for restaurant in cls.restaurants[:2]:
+            for product in cls.products:
+                RestaurantMenuItem.objects.create(restaurant=restaurant, product=product)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def create_order(self, products):
+        order = Order.objects.create(
+            firstname='Иван',
+            phonenumber='+79001234567',
+            address='Москва, Тверская улица, 10',
+            cooking_restaurant=self.restaurants[0],
+        )
+        OrderProduct.objects.bulk_create(
+            OrderProduct(order=order, product=product, quantity=1, fixed_price=100)
+            for product in products
+        )
+        return order
+
+    def count_queries(self, url):
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_changelist_query_count_does_not_depend_on_orders_count(self):
+        url = reverse('admin:foodcartapp_order_changelist')
+        self.create_order(self.products[:1])
+        queries_count, _ = self.count_queries(url)
+
+        for _ in range(10):
+            self.create_order(self.products[:1])
+        self.assertEqual(self.count_queries(url)[0], queries_count)
+
+    def test_change_form_query_count_does_not_depend_on_cart_size(self):
+        small_order = self.create_order(self.products[:1])
+        large_order = self.create_order(self.products)
+
+        small_count, _ = self.count_queries(reverse('admin:foodcartapp_order_change', args=[small_order.id]))
+        large_count, response = self.count_queries(reverse('admin:foodcartapp_order_change', args=[large_order.id]))
+
+        self.assertEqual(large_count, small_count)
+        restaurants = response.context['adminform'].form.fields['cooking_restaurant'].queryset
+        self.assertCountEqual(restaurants, self.restaurants[:2])
+
+
+class OrderAdminTotalPriceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='password')
+        cls.orders = {
+            total_price: Order.objects.create(
+                firstname='Иван',
+                phonenumber='+79001234567',
+                address='Москва, ул. Тверская, 5',
+                total_price=total_price,
+            )
+            for total_price in (300, 1500, 700, 2500, 1000)
+        }
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def get_changelist(self, **params):
+        response = self.client.get(reverse('admin:foodcartapp_order_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['cl'].result_list)
+
+    def test_orders_are_filtered_by_price_range(self):
+        orders = self.get_changelist(total_price='500-1000')
+        self.assertEqual([order.total_price for order in orders], [700])
+
+        orders = self.get_changelist(total_price='gte2000')
+        self.assertEqual([order.total_price for order in orders], [2500])
+
+    def test_orders_are_sorted_by_total_price(self):
+        column = OrderAdmin.list_display.index('total_price') + 1
+        orders = self.get_changelist(o=column)
+        self.assertEqual([order.total_price for order in orders], [300, 700, 1000, 1500, 2500])
+
+        orders = self.get_changelist(o=f'-{column}')
+        self.assertEqual([order.total_price for order in orders], [2500, 1500, 1000, 700, 300])
+
+
+class BannersApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def create_banner(self, title, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Banner.objects.create(title=title, image=f'{title}.jpg', **fields)
+
+    def get_titles(self):
+        return [banner['title'] for banner in self.client.get('/api/banners/').json()]
+
+    def test_only_banners_in_their_window_are_shown(self):
+        now = timezone.now()
+        self.create_banner('current', starts_at=now - timedelta(days=1), ends_at=now + timedelta(days=1))
+        self.create_banner('future', starts_at=now + timedelta(days=1))
+        self.create_banner('expired', ends_at=now - timedelta(days=1))
+        self.create_banner('hidden', is_active=False)
+
+        self.assertEqual(self.get_titles(), ['current'])
+
+    def test_cache_is_invalidated_on_save_and_when_a_window_ends(self):
+        ends_at = timezone.now() + timedelta(minutes=1)
+        self.create_banner('first', ends_at=ends_at)
+        self.assertEqual(self.get_titles(), ['first'])
+
+        second = self.create_banner('second', position=1)
+        self.assertEqual(self.get_titles(), ['first', 'second'])
+
+        later = ends_at + timedelta(seconds=1)
+        with mock.patch('django.utils.timezone.now', return_value=later), \
+                mock.patch('foodcartapp.banners.time.time', return_value=later.timestamp()):
+            self.assertEqual(self.get_titles(), ['second'])
+
+            with self.captureOnCommitCallbacks(execute=True):
+                second.title = 'renamed'
+                second.save()
+            self.assertEqual(self.get_titles(), ['renamed'])
+
+
+class JsonResponseTest(SimpleTestCase):
+    def get_request(self, accept_encoding='', **params):
+        return RequestFactory().get('/api/products/', params, HTTP_ACCEPT_ENCODING=accept_encoding)
+
+    def test_encoding_negotiation_respects_q_values(self):
+        cases = {
+            '': None,
+            'gzip': 'gzip',
+            'gzip;q=0': None,
+            'GZIP; q=0.5, identity': 'gzip',
+            '*': 'gzip',
+            '*;q=0.5, gzip;q=0': None,
+        }
+        with mock.patch('foodcartapp.responses.brotli', None):
+            for accept_encoding, encoding in cases.items():
+                with self.subTest(accept_encoding=accept_encoding):
+                    self.assertEqual(get_accepted_encoding(self.get_request(accept_encoding)), encoding)
+
+    def test_brotli_is_preferred_unless_refused_or_weighted_lower(self):
+        cases = {
+            'gzip, br': 'br',
+            'gzip, br;q=0': 'gzip',
+            'gzip;q=1.0, br;q=0.8': 'gzip',
+        }
+        with mock.patch('foodcartapp.responses.brotli', mock.Mock()):
+            for accept_encoding, encoding in cases.items():
+                with self.subTest(accept_encoding=accept_encoding):
+                    self.assertEqual(get_accepted_encoding(self.get_request(accept_encoding)), encoding)
+
+    def test_decimals_are_numbers_and_large_bodies_are_compressed(self):
+        data = [{'name': 'Бургер', 'price': Decimal('199.50')}] * 20
+
+        response = json_response(self.get_request('gzip'), data)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(response.content)), [{'name': 'Бургер', 'price': 199.5}] * 20)
+
+        response = json_response(self.get_request('gzip;q=0'), data)
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_pretty_output(self):
+        data = {'price': Decimal('100')}
+        self.assertEqual(json_response(self.get_request(), data).content, b'{"price":100.0}')
+        self.assertEqual(json_response(self.get_request(pretty=1), data).content, b'{\n    "price": 100.0\n}')
+
+
+class CatalogChangesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = Restaurant.objects.create(name='Star Burger', address='Москва, ул. Ленина, 1')
+        cls.products = {
+            name: Product.objects.create(name=name, price=100, image=f'{name}.jpg')
+            for name in ('changed', 'unchanged', 'disabled', 'deleted')
+        }
+        cls.menu_items = {
+            name: RestaurantMenuItem.objects.create(restaurant=cls.restaurant, product=product)
+            for name, product in cls.products.items()
+        }
+
+    def setUp(self):
+        cache.clear()
+        Product.objects.update(updated_at=timezone.now() - timedelta(days=1))
+
+    def get_changes(self, since=None, **headers):
+        return self.client.get('/api/products/changes/', {'since': since} if since else {}, headers=headers)
+
+    def test_full_sync_and_delta(self):
+        full = self.get_changes().json()
+        self.assertTrue(full['full'])
+        self.assertEqual([product['id'] for product in full['products']], sorted(p.id for p in self.products.values()))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products['changed'].price = 150
+            self.products['changed'].save()
+            self.menu_items['disabled'].availability = False
+            self.menu_items['disabled'].save()
+            deleted_id = self.products['deleted'].id
+            self.products['deleted'].delete()
+
+        delta = self.get_changes(full['version']).json()
+        self.assertFalse(delta['full'])
+        self.assertEqual([product['id'] for product in delta['products']], [self.products['changed'].id])
+        self.assertEqual(delta['products'][0]['price'], 150)
+        self.assertEqual(delta['removed'], sorted([self.products['disabled'].id, deleted_id]))
+        self.assertGreaterEqual(int(delta['version']), int(full['version']))
+
+    def test_unchanged_catalog_is_not_modified(self):
+        response = self.get_changes()
+        version = response.json()['version']
+
+        delta_response = self.get_changes(version)
+        self.assertEqual(delta_response.json()['products'], [])
+
+        with self.assertNumQueries(0):
+            not_modified = self.get_changes(version, if_none_match=delta_response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.assertEqual(self.get_changes(if_none_match=response['ETag']).status_code, 304)
+
+
+def create_orders_failing_on_one(validated_orders):
+    if any(order['firstname'] == 'Сбой' for order in validated_orders):
+        raise DatabaseError('value too long')
+    return create_orders(validated_orders)
+
+
+@override_settings(ORDER_INTAKE_ASYNC=True)
+class OrderIntakeTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        restaurant = Restaurant.objects.create(name='Star Burger', address='Москва, ул. Ленина, 1')
+        cls.products = [
+            Product.objects.create(name=f'Бургер {number}', price=100, image='burger.jpg')
+            for number in range(2)
+        ]
+        cls.menu_items = [
+            RestaurantMenuItem.objects.create(restaurant=restaurant, product=product)
+            for product in cls.products
+        ]
+
+    def register_order(self, firstname='Иван', product=None):
+        return self.client.post('/api/order/', {
+            'firstname': firstname,
+            'lastname': 'Петров',
+            'phonenumber': '+79001234567',
+            'address': 'Москва, ул. Тверская, 5',
+            'products': [{'product': (product or self.products[0]).id, 'quantity': 2}],
+        }, content_type='application/json')
+
+    def get_status(self, response):
+        return self.client.get(f'/api/order/status/{response.json()["tracking_id"]}/').json()
+
+    def test_order_is_accepted_then_created(self):
+        response = self.register_order()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.get_status(response)['status'], OrderIntake.Status.PENDING)
+        self.assertFalse(Order.objects.exists())
+
+        self.assertEqual(process_order_intake(), 1)
+        self.assertEqual(process_order_intake(), 0)
+
+        order = Order.objects.get()
+        self.assertEqual(order.total_price, 200)
+        self.assertEqual(
+            self.get_status(response),
+            {'tracking_id': response.json()['tracking_id'], 'status': 'confirmed', 'order_id': order.id, 'errors': None},
+        )
+
+    def test_invalid_payload_is_rejected_without_blocking_the_batch(self):
+        rejected_response = self.register_order(product=self.products[1])
+        accepted_response = self.register_order()
+        self.menu_items[1].delete()
+
+        self.assertEqual(process_order_intake(), 2)
+
+        rejected = self.get_status(rejected_response)
+        self.assertEqual(rejected['status'], OrderIntake.Status.REJECTED)
+        self.assertIn('products', rejected['errors'])
+        self.assertEqual(self.get_status(accepted_response)['status'], OrderIntake.Status.CONFIRMED)
+
+    def test_failing_order_does_not_block_the_queue(self):
+        failing_response = self.register_order(firstname='Сбой')
+        accepted_response = self.register_order()
+        with mock.patch('foodcartapp.intake.create_orders', create_orders_failing_on_one), \
+                mock.patch('foodcartapp.orders.create_orders', create_orders_failing_on_one):
+            self.assertEqual(process_order_intake(), 2)
+
+        self.assertEqual(
+            self.get_status(failing_response)['errors'],
+            {'non_field_errors': ['value too long']},
+        )
+        self.assertEqual(self.get_status(accepted_response)['status'], OrderIntake.Status.CONFIRMED)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(process_order_intake(), 0)
+
+
+class ImportOrdersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        restaurant = Restaurant.objects.create(name='Star Burger', address='Москва, ул. Ленина, 1')
+        cls.products = [
+            Product.objects.create(name=f'Бургер {number}', price=100 + number, image='burger.jpg')
+            for number in range(2)
+        ]
+        for product in cls.products:
+            RestaurantMenuItem.objects.create(restaurant=restaurant, product=product)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def write_file(self, name, content, encoding='utf-8'):
+        path = self.directory / name
+        path.write_bytes(content.encode(encoding))
+        return str(path)
+
+    def import_orders(self, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_orders', *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def make_order(self, firstname, product_id):
+        return json.dumps({
+            'firstname': firstname,
+            'lastname': 'Петров',
+            'phonenumber': '+79001234567',
+            'address': 'Москва, ул. Тверская, 5',
+            'products': [{'product': product_id, 'quantity': 1}],
+        }, ensure_ascii=False)
+
+    def test_csv_rows_are_grouped_by_order(self):
+        first, second = self.products
+        path = self.write_file('orders.csv', '\n'.join([
+            'order,firstname,lastname,phonenumber,address,product,quantity',
+            f'a,Иван,Петров,+79001234567,"Москва, ул. Тверская, 5",{first.id},2',
+            f'a,Иван,Петров,+79001234567,"Москва, ул. Тверская, 5",{second.id},1',
+            f'b,Анна,Смирнова,+79001234568,"Москва, ул. Арбат, 1",{second.id},3',
+        ]))
+
+        self.import_orders(path)
+
+        orders = {order.firstname: order for order in Order.objects.all()}
+        self.assertEqual(orders['Иван'].order_products.count(), 2)
+        self.assertEqual(orders['Иван'].total_price, first.price * 2 + second.price)
+        self.assertEqual(orders['Анна'].total_price, second.price * 3)
+
+    def test_jsonl_is_imported_in_chunks_and_rejects_are_reported(self):
+        lines = [self.make_order(f'Клиент {number}', self.products[0].id) for number in range(5)]
+        lines.insert(2, '{broken')
+        lines.insert(4, self.make_order('Без товара', 0))
+        path = self.write_file('orders.jsonl', '\n'.join(lines))
+        rejects_path = str(self.directory / 'rejects.jsonl')
+
+        stdout, stderr = self.import_orders(path, '--chunk-size', '2', '--rejects', rejects_path)
+
+        self.assertEqual(Order.objects.count(), 5)
+        self.assertEqual(stdout.count('Импортировано'), 3)
+        self.assertIn('Импортировано: 5, отклонено: 2', stdout)
+        self.assertIn('Строка 3:', stderr)
+        self.assertIn('Строка 5:', stderr)
+        with open(rejects_path, encoding='utf-8') as rejects_file:
+            rejects = [json.loads(line) for line in rejects_file]
+        self.assertEqual([reject['line'] for reject in rejects], [3, 5])
+        self.assertIsNone(rejects[0]['payload'])
+        self.assertEqual(rejects[1]['payload']['firstname'], 'Без товара')
+
+    def test_failing_chunk_is_saved_order_by_order(self):
+        lines = [self.make_order(firstname, self.products[0].id) for firstname in ('Иван', 'Сбой', 'Анна')]
+        path = self.write_file('orders.jsonl', '\n'.join(lines))
+        rejects_path = str(self.directory / 'rejects.jsonl')
+
+        with mock.patch('foodcartapp.management.commands.import_orders.create_orders', create_orders_failing_on_one), \
+                mock.patch('foodcartapp.orders.create_orders', create_orders_failing_on_one):
+            stdout, stderr = self.import_orders(path, '--rejects', rejects_path)
+
+        self.assertEqual(set(Order.objects.values_list('firstname', flat=True)), {'Иван', 'Анна'})
+        self.assertIn('Импортировано: 2, отклонено: 1', stdout)
+        self.assertIn('Строка 2:', stderr)
+        with open(rejects_path, encoding='utf-8') as rejects_file:
+            reject, = [json.loads(line) for line in rejects_file]
+        self.assertEqual(reject['errors'], {'non_field_errors': ['value too long']})
+        self.assertEqual(reject['payload']['firstname'], 'Сбой')
+
+    def test_unreadable_input_is_reported(self):
+        with self.assertRaises(CommandError):
+            self.import_orders(str(self.directory / 'missing.jsonl'))
+
+        path = self.write_file('orders.jsonl', self.make_order('Иван', self.products[0].id), encoding='cp1251')
+        with self.assertRaises(CommandError):
+            self.import_orders(path)
@@ -1,13 +1,15 @@
 from django.urls import path
 from django.urls.conf import include
 
-from .views import product_list_api, banners_list_api, register_order, test
+from .views import product_list_api, product_changes_api, banners_list_api, register_order, order_intake_status, test
 
 app_name = "foodcartapp"
 
 urlpatterns = [
     path('products/', product_list_api),
+    path('products/changes/', product_changes_api),
     path('banners/', banners_list_api),
     path('order/', register_order),
+    path('order/status/<uuid:tracking_id>/', order_intake_status),
     path('test/', test)
 ]
@@ -1,76 +1,83 @@
 import phonenumbers
-from django.http import JsonResponse
+from django.conf import settings
 from django.db import transaction
 from django.http.response import HttpResponse
-from django.templatetags.static import static
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 
-from .models import Product, Order, OrderProduct
+from star_burger.versions import get_version
+
+from .banners import get_banners, get_banners_cache_key
+from .catalog import (
+    CATALOG_CHANGES_CACHE_TIMEOUT,
+    CATALOG_VERSION,
+    get_catalog,
+    get_catalog_changes,
+    get_catalog_changes_cache_key,
+    get_catalog_changes_etag,
+    get_catalog_etag,
+    get_catalog_last_modified,
+    parse_catalog_cursor,
+)
+from .idempotency import idempotent
+from .intake import serialize_intake
+from .models import OrderIntake
+from .responses import cached_json_response
 from .serializers import OrderSerializer
 
 
 def banners_list_api(request):
-    # FIXME move data to db?
-    return JsonResponse([
-        {
-            'title': 'Burger',
-            'src': static('burger.jpg'),
-            'text': 'Tasty Burger at your door step',
-        },
-        {
-            'title': 'Spices',
-            'src': static('food.jpg'),
-            'text': 'All Cuisines',
-        },
-        {
-            'title': 'New York',
-            'src': static('tasty.jpg'),
-            'text': 'Food is incomplete without a tasty dessert',
-        }
-    ], safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
-    })
+    return cached_json_response(request, get_banners_cache_key(), get_banners)
 
 
+@condition(etag_func=get_catalog_etag, last_modified_func=get_catalog_last_modified)
 def product_list_api(request):
-    products = Product.objects.select_related('category').available()
-
-    dumped_products = []
-    for product in products:
-        dumped_product = {
-            'id': product.id,
-            'name': product.name,
-            'price': product.price,
-            'special_status': product.special_status,
-            'description': product.description,
-            'category': {
-                'id': product.category.id,
-                'name': product.category.name,
-            } if product.category else None,
-            'image': product.image.url,
-            'restaurant': {
-                'id': product.id,
-                'name': product.name,
-            }
-        }
-        dumped_products.append(dumped_product)
-    return JsonResponse(dumped_products, safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
-    })
+    response = cached_json_response(
+        request,
+        f'catalog:{get_version(CATALOG_VERSION)}',
+        get_catalog,
+    )
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+@condition(etag_func=get_catalog_changes_etag, last_modified_func=get_catalog_last_modified)
+def product_changes_api(request):
+    since = parse_catalog_cursor(request.GET.get('since'))
+    response = cached_json_response(
+        request,
+        get_catalog_changes_cache_key(since),
+        lambda: get_catalog_changes(since),
+        timeout=CATALOG_CHANGES_CACHE_TIMEOUT if since else None,
+    )
+    patch_cache_control(response, no_cache=True)
+    return response
+
 
 @api_view(['POST'])
+@idempotent
 def register_order(request):
     serializer = OrderSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
+    if settings.ORDER_INTAKE_ASYNC:
+        intake = OrderIntake.objects.create(payload=request.data)
+        return Response(serialize_intake(intake), status=status.HTTP_202_ACCEPTED)
+
     order = serializer.save()
     response_serializer = OrderSerializer(order)
     return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
 
+@api_view(['GET'])
+def order_intake_status(request, tracking_id):
+    intake = get_object_or_404(OrderIntake, tracking_id=tracking_id)
+    return Response(serialize_intake(intake))
+
+
 
 def test(request):
     a = None
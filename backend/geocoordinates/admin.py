@@ -1,9 +1,18 @@
 from django.contrib import admin
 from .models import PlaceCoordinates
+from .normalization import normalize_address
 
 @admin.register(PlaceCoordinates)
 class PlaceCoordinatesAdmin(admin.ModelAdmin):
-    list_display = ('address', 'lat', 'lon', 'updated_at')
-    list_filter = ('updated_at',)
+    list_display = ('address', 'lat', 'lon', 'status', 'failed_attempts', 'retry_at', 'updated_at')
+    list_filter = ('status', 'updated_at',)
     search_fields = ('address',)
-    readonly_fields = ('updated_at',)
+    readonly_fields = ('failed_attempts', 'retry_at', 'updated_at',)
+
+    def save_model(self, request, obj, form, change):
+        obj.address = normalize_address(obj.address)
+        if obj.lat is not None and obj.lon is not None:
+            obj.status = PlaceCoordinates.Status.FOUND
+            obj.failed_attempts = 0
+            obj.retry_at = None
+        super().save_model(request, obj, form, change)
@@ -0,0 +1,72 @@
+import threading
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.utils import timezone
+
+from .normalization import normalize_address
+
+
+COORDINATES_VERSION = 'coordinates'
+
+
+def make_cache_key(address):
+    return normalize_address(address)
+
+
+class CoordinatesCache:
+    def __init__(self, maxsize, ttl):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, addresses):
+        found = {}
+        now = timezone.now()
+        with self._lock:
+            for address in addresses:
+                entry = self._cache.get(make_cache_key(address))
+                if not entry:
+                    continue
+                coords, status, retry_at = entry
+                if retry_at and retry_at <= now:
+                    continue
+                found[address] = (coords, status)
+            self.hits += len(found)
+            self.misses += len(addresses) - len(found)
+        return found
+
+    def set_many(self, places):
+        with self._lock:
+            for place in places:
+                self._cache[make_cache_key(place.address)] = (
+                    place.coordinates,
+                    place.status,
+                    place.retry_at,
+                )
+
+    def invalidate(self, address):
+        with self._lock:
+            self._cache.pop(make_cache_key(address), None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._cache),
+                'maxsize': self._cache.maxsize,
+            }
+
+
+coordinates_cache = CoordinatesCache(
+    maxsize=settings.GEOCODER_CACHE_SIZE,
+    ttl=settings.GEOCODER_CACHE_TTL,
+)
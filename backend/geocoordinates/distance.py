@@ -0,0 +1,43 @@
+import numpy as np
+from geopy.distance import geodesic
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_coordinates_array(coordinates):
+    return np.array(
+        [coords if coords else (np.nan, np.nan) for coords in coordinates],
+        dtype=float,
+    ).reshape(-1, 2)
+
+
+def haversine_matrix(origins, destinations):
+    origins = np.radians(to_coordinates_array(origins))
+    destinations = np.radians(to_coordinates_array(destinations))
+
+    lat1, lon1 = origins[:, 0, np.newaxis], origins[:, 1, np.newaxis]
+    lat2, lon2 = destinations[np.newaxis, :, 0], destinations[np.newaxis, :, 1]
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def distance_matrix(origins, destinations, exact_top_k=None, mask=None):
+    distances = haversine_matrix(origins, destinations)
+    if mask is not None:
+        distances = np.where(mask, distances, np.nan)
+
+    if exact_top_k and distances.size:
+        top_k = min(exact_top_k, distances.shape[1])
+        nearest = np.argpartition(distances, top_k - 1, axis=1)[:, :top_k]
+        for row, columns in enumerate(nearest):
+            for column in columns:
+                if np.isnan(distances[row, column]):
+                    continue
+                distances[row, column] = geodesic(origins[row], destinations[column]).kilometers
+
+    return np.round(distances, 1)
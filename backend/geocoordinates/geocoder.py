@@ -0,0 +1,106 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class RateLimiter:
+    def __init__(self, calls_per_second=None):
+        self.interval = 1 / calls_per_second if calls_per_second else 0
+        self._next_call_at = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            call_at = max(now, self._next_call_at)
+            self._next_call_at = call_at + self.interval
+        if call_at > now:
+            time.sleep(call_at - now)
+
+
+class GeocoderClient:
+    def __init__(self, apikey, base_url, max_workers=4, timeout=5, retries=2, rate_limit=None):
+        self.apikey = apikey
+        self.base_url = base_url
+        self.timeout = timeout
+
+        adapter = HTTPAdapter(
+            pool_maxsize=max_workers,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=('GET',),
+            ),
+        )
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='geocoder')
+        self._rate_limiter = RateLimiter(rate_limit)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, address):
+        self._rate_limiter.wait()
+        response = self.session.get(self.base_url, params={
+            'geocode': address,
+            'apikey': self.apikey,
+            'format': 'json',
+        }, timeout=self.timeout)
+        response.raise_for_status()
+        found_places = response.json()['response']['GeoObjectCollection']['featureMember']
+
+        if not found_places:
+            return None
+
+        most_relevant = found_places[0]
+        lon, lat = most_relevant['GeoObject']['Point']['pos'].split(' ')
+        return float(lat), float(lon)
+
+    def submit(self, address):
+        with self._lock:
+            future = self._in_flight.get(address)
+            if future:
+                return future
+            future = self._executor.submit(self.fetch, address)
+            self._in_flight[address] = future
+
+        future.add_done_callback(lambda done: self._forget(address, done))
+        return future
+
+    def fetch_many(self, addresses):
+        return {address: self.submit(address) for address in set(addresses)}
+
+    def _forget(self, address, future):
+        with self._lock:
+            if self._in_flight.get(address) is future:
+                del self._in_flight[address]
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_geocoder_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GeocoderClient(
+                apikey=settings.YANDEX_GEOCODER_API_KEY,
+                base_url=settings.GEOCODER_URL,
+                max_workers=settings.GEOCODER_MAX_WORKERS,
+                timeout=settings.GEOCODER_TIMEOUT,
+                retries=settings.GEOCODER_RETRIES,
+                rate_limit=settings.GEOCODER_RATE_LIMIT,
+            )
+        return _client
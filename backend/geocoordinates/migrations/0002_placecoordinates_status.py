@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geocoordinates', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='placecoordinates',
+            name='failed_attempts',
+            field=models.PositiveIntegerField(default=0, verbose_name='Неудачных попыток подряд'),
+        ),
+        migrations.AddField(
+            model_name='placecoordinates',
+            name='retry_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Следующая попытка'),
+        ),
+        migrations.AddField(
+            model_name='placecoordinates',
+            name='status',
+            field=models.CharField(choices=[('found', 'Найден'), ('not_found', 'Не найден'), ('failed', 'Ошибка геокодера')], db_index=True, default='found', max_length=20, verbose_name='Статус'),
+        ),
+        migrations.AlterField(
+            model_name='placecoordinates',
+            name='lat',
+            field=models.FloatField(blank=True, null=True, verbose_name='Широта'),
+        ),
+        migrations.AlterField(
+            model_name='placecoordinates',
+            name='lon',
+            field=models.FloatField(blank=True, null=True, verbose_name='Долгота'),
+        ),
+    ]
@@ -0,0 +1,78 @@
+import re
+from collections import defaultdict
+
+from django.db import migrations
+
+
+# Правила нормализации на момент миграции: последующие изменения
+# geocoordinates.normalization не должны менять её результат.
+ABBREVIATIONS = {
+    'г': 'город',
+    'обл': 'область',
+    'р-н': 'район',
+    'пос': 'поселок',
+    'мкр': 'микрорайон',
+    'мкрн': 'микрорайон',
+    'ул': 'улица',
+    'пр-т': 'проспект',
+    'просп': 'проспект',
+    'пр-д': 'проезд',
+    'пер': 'переулок',
+    'пл': 'площадь',
+    'ш': 'шоссе',
+    'наб': 'набережная',
+    'б-р': 'бульвар',
+    'бул': 'бульвар',
+    'туп': 'тупик',
+    'д': 'дом',
+    'к': 'корпус',
+    'корп': 'корпус',
+    'стр': 'строение',
+    'кв': 'квартира',
+}
+
+MAX_NORMALIZED_ADDRESS_LENGTH = 255
+
+SPACE_BEFORE_PUNCTUATION = re.compile(r'\s+([,.;:])')
+MISSING_SPACE_AFTER_PUNCTUATION = re.compile(r'([,;])(?=\S)')
+PUNCTUATION = re.compile(r'[^\w\s/-]')
+
+
+def clean_address(address):
+    address = ' '.join(address.split())
+    address = SPACE_BEFORE_PUNCTUATION.sub(r'\1', address)
+    address = MISSING_SPACE_AFTER_PUNCTUATION.sub(r'\1 ', address)
+    return address.strip(' ,;.')
+
+
+def normalize_address(address):
+    address = clean_address(address).casefold().replace('ё', 'е')
+    words = (word.strip('-') for word in PUNCTUATION.sub(' ', address).split())
+    address = ' '.join(ABBREVIATIONS.get(word, word) for word in words if word)
+    return address[:MAX_NORMALIZED_ADDRESS_LENGTH].rstrip()
+
+
+def merge_normalized_addresses(apps, schema_editor):
+    PlaceCoordinates = apps.get_model('geocoordinates', 'PlaceCoordinates')
+
+    places_by_address = defaultdict(list)
+    for place in PlaceCoordinates.objects.all():
+        places_by_address[normalize_address(place.address)].append(place)
+
+    for address, places in places_by_address.items():
+        places.sort(key=lambda place: (place.status == 'found', place.updated_at), reverse=True)
+        kept_place, *duplicates = places
+        PlaceCoordinates.objects.filter(id__in=[place.id for place in duplicates]).delete()
+        if kept_place.address != address:
+            PlaceCoordinates.objects.filter(id=kept_place.id).update(address=address)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geocoordinates', '0002_placecoordinates_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_normalized_addresses, reverse_code=migrations.RunPython.noop),
+    ]
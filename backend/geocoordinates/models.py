@@ -1,15 +1,38 @@
 from django.db import models
+from django.utils import timezone
 import datetime
 
 class PlaceCoordinates(models.Model):
+    class Status(models.TextChoices):
+        FOUND = 'found', 'Найден'
+        NOT_FOUND = 'not_found', 'Не найден'
+        FAILED = 'failed', 'Ошибка геокодера'
+
     address = models.CharField(
         'Адрес места',
         max_length=255,
         unique=True,
         db_index=True
     )
-    lat = models.FloatField('Широта')
-    lon = models.FloatField('Долгота')
+    lat = models.FloatField('Широта', null=True, blank=True)
+    lon = models.FloatField('Долгота', null=True, blank=True)
+    status = models.CharField(
+        'Статус',
+        max_length=20,
+        choices=Status.choices,
+        default=Status.FOUND,
+        db_index=True
+    )
+    failed_attempts = models.PositiveIntegerField(
+        'Неудачных попыток подряд',
+        default=0
+    )
+    retry_at = models.DateTimeField(
+        'Следующая попытка',
+        null=True,
+        blank=True,
+        db_index=True
+    )
     updated_at = models.DateTimeField(
         'Дата обновления координат',
         auto_now=True
@@ -22,5 +45,13 @@ class PlaceCoordinates(models.Model):
     def __str__(self):
         return f'{self.address} ({self.lat}, {self.lon})'
 
+    @property
+    def coordinates(self):
+        if self.status != self.Status.FOUND:
+            return None
+        return (self.lat, self.lon)
+
     def is_expired(self):
-        return (datetime.datetime.now() - self.updated_at.replace(tzinfo=None)) > datetime.timedelta(days=30)
+        if self.status == self.Status.FOUND:
+            return timezone.now() - self.updated_at > datetime.timedelta(days=30)
+        return not self.retry_at or self.retry_at <= timezone.now()
@@ -0,0 +1,47 @@
+import re
+
+
+ABBREVIATIONS = {
+    'г': 'город',
+    'обл': 'область',
+    'р-н': 'район',
+    'пос': 'поселок',
+    'мкр': 'микрорайон',
+    'мкрн': 'микрорайон',
+    'ул': 'улица',
+    'пр-т': 'проспект',
+    'просп': 'проспект',
+    'пр-д': 'проезд',
+    'пер': 'переулок',
+    'пл': 'площадь',
+    'ш': 'шоссе',
+    'наб': 'набережная',
+    'б-р': 'бульвар',
+    'бул': 'бульвар',
+    'туп': 'тупик',
+    'д': 'дом',
+    'к': 'корпус',
+    'корп': 'корпус',
+    'стр': 'строение',
+    'кв': 'квартира',
+}
+
+MAX_NORMALIZED_ADDRESS_LENGTH = 255
+
+SPACE_BEFORE_PUNCTUATION = re.compile(r'\s+([,.;:])')
+MISSING_SPACE_AFTER_PUNCTUATION = re.compile(r'([,;])(?=\S)')
+PUNCTUATION = re.compile(r'[^\w\s/-]')
+
+
+def clean_address(address):
+    address = ' '.join(address.split())
+    address = SPACE_BEFORE_PUNCTUATION.sub(r'\1', address)
+    address = MISSING_SPACE_AFTER_PUNCTUATION.sub(r'\1 ', address)
+    return address.strip(' ,;.')
+
+
+def normalize_address(address):
+    address = clean_address(address).casefold().replace('ё', 'е')
+    words = (word.strip('-') for word in PUNCTUATION.sub(' ', address).split())
+    address = ' '.join(ABBREVIATIONS.get(word, word) for word in words if word)
+    return address[:MAX_NORMALIZED_ADDRESS_LENGTH].rstrip()
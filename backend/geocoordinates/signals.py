@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from star_burger.versions import bump_version_on_commit
+
+from .cache import COORDINATES_VERSION, coordinates_cache
+from .models import PlaceCoordinates
+
+
+@receiver(post_save, sender=PlaceCoordinates)
+@receiver(post_delete, sender=PlaceCoordinates)
+def invalidate_cached_coordinates(sender, instance, **kwargs):
+    coordinates_cache.invalidate(instance.address)
+    bump_version_on_commit(COORDINATES_VERSION)
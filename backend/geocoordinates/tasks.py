@@ -0,0 +1,68 @@
+import logging
+import queue
+import threading
+
+from django.db import close_old_connections
+
+from .utils import get_coordinates_many
+
+
+logger = logging.getLogger(__name__)
+
+_addresses = queue.Queue()
+_queued_addresses = set()
+_lock = threading.Lock()
+_worker = None
+
+QUEUE_BATCH_SIZE = 100
+
+
+def _take_batch(batch_size=QUEUE_BATCH_SIZE):
+    batch = [_addresses.get()]
+    while len(batch) < batch_size:
+        try:
+            batch.append(_addresses.get_nowait())
+        except queue.Empty:
+            break
+
+    with _lock:
+        _queued_addresses.difference_update(batch)
+    return batch
+
+
+def _geocode_queued_addresses():
+    while True:
+        batch = _take_batch()
+
+        close_old_connections()
+        try:
+            get_coordinates_many(batch)
+        except Exception:
+            logger.exception('Не удалось определить координаты адресов %r', batch)
+        finally:
+            close_old_connections()
+            for _ in batch:
+                _addresses.task_done()
+
+
+def _start_worker():
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = threading.Thread(
+            target=_geocode_queued_addresses,
+            name='geocoder',
+            daemon=True,
+        )
+        _worker.start()
+
+
+def enqueue_address(address):
+    if not address:
+        return
+
+    with _lock:
+        if address in _queued_addresses:
+            return
+        _queued_addresses.add(address)
+        _start_worker()
+    _addresses.put(address)
@@ -1,3 +1,260 @@
-from django.test import TestCase
+import importlib
+import json
+import threading
+import time
+from concurrent.futures import Future
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+import numpy as np
+import requests
+from django.apps import apps
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from geopy.distance import geodesic
+
+from . import tasks
+from .cache import coordinates_cache
+from .distance import distance_matrix, haversine_matrix
+from .geocoder import GeocoderClient, RateLimiter
+from .models import PlaceCoordinates
+from .normalization import MAX_NORMALIZED_ADDRESS_LENGTH, clean_address, normalize_address
+from .utils import get_coordinates_many
+
+
+class StubGeocoderHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        address = parse_qs(urlparse(self.path).query)['geocode'][0]
+        self.server.requested_addresses.append(address)
+        time.sleep(self.server.delay)
+
+        if address == 'сломанный адрес':
+            self.send_response(500)
+            self.end_headers()
+            return
+
+        if address == 'несуществующий адрес':
+            found_places = []
+        else:
+            found_places = [{'GeoObject': {'Point': {'pos': '37.6 55.7'}}}]
+        body = json.dumps({
+            'response': {'GeoObjectCollection': {'featureMember': found_places}},
+        }).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubGeocoderServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        pass
+
+
+class GeocoderClientTest(SimpleTestCase):
+    def setUp(self):
+        self.server = StubGeocoderServer(('127.0.0.1', 0), StubGeocoderHandler)
+        self.server.requested_addresses = []
+        self.server.delay = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        host, port = self.server.server_address
+        self.base_url = f'http://{host}:{port}/1.x'
+
+    def make_client(self, **kwargs):
+        kwargs.setdefault('retries', 0)
+        return GeocoderClient('apikey', self.base_url, **kwargs)
+
+    def test_fetch(self):
+        client = self.make_client()
+        self.assertEqual(client.fetch('Москва'), (55.7, 37.6))
+        self.assertIsNone(client.fetch('несуществующий адрес'))
+
+    def test_fetch_many_runs_concurrently(self):
+        self.server.delay = 0.2
+        client = self.make_client(max_workers=4)
+        addresses = [f'Москва, ул. Ленина {number}' for number in range(4)]
+
+        started_at = time.monotonic()
+        futures = client.fetch_many(addresses)
+        results = {address: future.result() for address, future in futures.items()}
+
+        self.assertLess(time.monotonic() - started_at, 0.6)
+        self.assertEqual(results, dict.fromkeys(addresses, (55.7, 37.6)))
+
+    def test_in_flight_addresses_are_fetched_once(self):
+        self.server.delay = 0.2
+        client = self.make_client()
+
+        first = client.submit('Москва')
+        second = client.submit('Москва')
+
+        self.assertIs(first, second)
+        first.result()
+        self.assertEqual(self.server.requested_addresses, ['Москва'])
+
+    def test_server_errors_are_retried_and_raised(self):
+        client = self.make_client(retries=1)
+        with self.assertRaises(requests.RequestException):
+            client.submit('сломанный адрес').result()
+        self.assertEqual(len(self.server.requested_addresses), 2)
+
+    def test_timeout(self):
+        self.server.delay = 0.5
+        client = self.make_client(timeout=0.1)
+        with self.assertRaises(requests.RequestException):
+            client.submit('Москва').result()
+
+
+class StubGeocoderClient:
+    def __init__(self, results):
+        self.results = list(results)
+        self.requested_addresses = []
+
+    def fetch_many(self, addresses):
+        futures = {}
+        for address in addresses:
+            self.requested_addresses.append(address)
+            future = Future()
+            result = self.results.pop(0)
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+            futures[address] = future
+        return futures
+
+
+@override_settings(
+    YANDEX_GEOCODER_API_KEY='apikey',
+    GEOCODER_RETRY_DELAY=timedelta(minutes=10),
+    GEOCODER_RETRY_MAX_DELAY=timedelta(minutes=30),
+)
+class GeocodingRetryTest(TestCase):
+    address = 'Москва, ул. Несуществующая, 1'
+
+    def setUp(self):
+        coordinates_cache.clear()
+        self.addCleanup(coordinates_cache.clear)
+        self.started_at = timezone.now()
+
+    def geocode(self, client, minutes):
+        now = self.started_at + timedelta(minutes=minutes)
+        with mock.patch('geocoordinates.utils.get_geocoder_client', return_value=client), \
+                mock.patch('django.utils.timezone.now', return_value=now):
+            get_coordinates_many([self.address])
+        return PlaceCoordinates.objects.get(address=normalize_address(self.address))
+
+    def test_failures_are_retried_with_growing_delay(self):
+        client = StubGeocoderClient([requests.ConnectionError(), None, None, None])
+
+        place = self.geocode(client, minutes=0)
+        self.assertEqual(place.status, PlaceCoordinates.Status.FAILED)
+        self.assertEqual(place.failed_attempts, 1)
+        self.assertEqual(place.retry_at, self.started_at + timedelta(minutes=10))
+
+        self.geocode(client, minutes=5)
+        self.assertEqual(len(client.requested_addresses), 1)
+
+        expected_delays = {10: 20, 30: 30, 60: 30}
+        for attempt, (minutes, delay) in enumerate(expected_delays.items(), start=2):
+            place = self.geocode(client, minutes=minutes)
+            self.assertEqual(place.status, PlaceCoordinates.Status.NOT_FOUND)
+            self.assertEqual(place.failed_attempts, attempt)
+            self.assertEqual(place.retry_at, self.started_at + timedelta(minutes=minutes + delay))
+        self.assertEqual(len(client.requested_addresses), 4)
+
+
+class RateLimiterTest(SimpleTestCase):
+    def test_calls_are_spaced(self):
+        limiter = RateLimiter(calls_per_second=20)
+        started_at = time.monotonic()
+        for _ in range(5):
+            limiter.wait()
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.2)
+
+
+class GeocodeQueueTest(SimpleTestCase):
+    def test_queued_addresses_are_taken_as_one_batch(self):
+        addresses = [f'Москва, ул. Ленина {number}' for number in range(3)]
+        for address in addresses:
+            tasks._addresses.put(address)
+            tasks._queued_addresses.add(address)
+
+        self.assertEqual(tasks._take_batch(batch_size=2), addresses[:2])
+        self.assertEqual(tasks._take_batch(batch_size=2), addresses[2:])
+        self.assertFalse(tasks._queued_addresses & set(addresses))
+        for _ in addresses:
+            tasks._addresses.task_done()
+
+
+class DistanceMatrixTest(SimpleTestCase):
+    red_square = (55.7539, 37.6208)
+    arbat = (55.7520, 37.5927)
+    tverskaya = (55.7652, 37.6050)
+    petersburg = (59.9386, 30.3141)
+
+    def test_nearest_distances_are_refined_with_geodesic(self):
+        destinations = [self.arbat, self.tverskaya, self.petersburg]
+        distances = distance_matrix([self.red_square], destinations, exact_top_k=2)
+
+        for column, destination in enumerate(destinations[:2]):
+            self.assertEqual(distances[0, column], round(geodesic(self.red_square, destination).kilometers, 1))
+        self.assertEqual(distances[0, 2], round(haversine_matrix([self.red_square], [self.petersburg])[0, 0], 1))
+        self.assertAlmostEqual(distances[0, 2], geodesic(self.red_square, self.petersburg).kilometers, delta=2)
+
+    def test_masked_and_missing_coordinates_are_nan(self):
+        mask = np.array([[True, False], [True, True]])
+        distances = distance_matrix([self.red_square, None], [self.arbat, self.tverskaya], exact_top_k=1, mask=mask)
+
+        self.assertEqual(distances[0, 0], round(geodesic(self.red_square, self.arbat).kilometers, 1))
+        self.assertTrue(np.isnan(distances[0, 1]))
+        self.assertTrue(np.isnan(distances[1]).all())
+
+
+class NormalizeAddressTest(SimpleTestCase):
+    def test_spelling_variants_share_a_key(self):
+        variants = [
+            'Москва, ул. Тверская, д. 5',
+            '  москва ,ул Тверская,дом 5 ',
+            'Москва, улица Тверская, д 5',
+        ]
+        self.assertEqual({normalize_address(address) for address in variants}, {'москва улица тверская дом 5'})
+
+    def test_yo_is_replaced(self):
+        self.assertEqual(normalize_address('Королёв, ул. Зелёная'), 'королев улица зеленая')
+
+    def test_clean_address_keeps_spelling(self):
+        self.assertEqual(clean_address('  Москва ,ул. Тверская,5 '), 'Москва, ул. Тверская, 5')
+
+    def test_expanded_address_fits_the_column(self):
+        address = ', '.join(['ул. Д'] * 50)[:250]
+        self.assertLessEqual(len(normalize_address(address)), MAX_NORMALIZED_ADDRESS_LENGTH)
+        self.assertEqual(
+            MAX_NORMALIZED_ADDRESS_LENGTH,
+            PlaceCoordinates._meta.get_field('address').max_length,
+        )
+
+
+class MergeNormalizedAddressesMigrationTest(TestCase):
+    def test_duplicates_are_merged_into_the_found_place(self):
+        migration = importlib.import_module('geocoordinates.migrations.0003_merge_normalized_addresses')
+        PlaceCoordinates.objects.create(address='Москва, ул. Тверская, 5', status=PlaceCoordinates.Status.NOT_FOUND)
+        found = PlaceCoordinates.objects.create(address='москва улица Тверская 5', lat=55.7, lon=37.6)
+        other = PlaceCoordinates.objects.create(address='Москва, Арбат, 1', lat=55.75, lon=37.59)
+
+        migration.merge_normalized_addresses(apps, None)
+
+        self.assertEqual(
+            dict(PlaceCoordinates.objects.values_list('address', 'id')),
+            {'москва улица тверская 5': found.id, 'москва арбат 1': other.id},
+        )
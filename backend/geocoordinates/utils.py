@@ -1,52 +1,93 @@
 import requests
 from django.conf import settings
+from django.utils import timezone
+from .cache import coordinates_cache
+from .geocoder import get_geocoder_client
 from .models import PlaceCoordinates
-from django.core.exceptions import ObjectDoesNotExist
+from .normalization import normalize_address
 from geopy.distance import geodesic
 
-def fetch_coordinates(apikey, address):
-    base_url = "https://geocode-maps.yandex.ru/1.x"
-    response = requests.get(base_url, params={
-        "geocode": address,
-        "apikey": apikey,
-        "format": "json",
-    })
-    response.raise_for_status()
-    found_places = response.json()['response']['GeoObjectCollection']['featureMember']
-
-    if not found_places:
-        return None
+def get_retry_delay(failed_attempts):
+    delay = settings.GEOCODER_RETRY_DELAY * 2 ** (failed_attempts - 1)
+    return min(delay, settings.GEOCODER_RETRY_MAX_DELAY)
 
-    most_relevant = found_places[0]
-    lon, lat = most_relevant['GeoObject']['Point']['pos'].split(" ")
-    return float(lat), float(lon)
 
+def get_geocoding_result(place, coords, failed):
+    if coords:
+        lat, lon = coords
+        return {
+            'lat': lat,
+            'lon': lon,
+            'status': PlaceCoordinates.Status.FOUND,
+            'failed_attempts': 0,
+            'retry_at': None,
+        }
 
-def get_coordinates(address):
-    if not settings.YANDEX_GEOCODER_API_KEY:
-        return None
+    failed_attempts = place.failed_attempts + 1 if place else 1
+    return {
+        'lat': None,
+        'lon': None,
+        'status': PlaceCoordinates.Status.FAILED if failed else PlaceCoordinates.Status.NOT_FOUND,
+        'failed_attempts': failed_attempts,
+        'retry_at': timezone.now() + get_retry_delay(failed_attempts),
+    }
 
-    try:
-        place_coords = PlaceCoordinates.objects.get(address=address)
-        if not place_coords.is_expired():
-            return (place_coords.lat, place_coords.lon)
-    except ObjectDoesNotExist:
-        pass
 
-    try:
-        coordinates = fetch_coordinates(settings.YANDEX_GEOCODER_API_KEY, address)
-        lat, lon = coordinates if coordinates else (None, None)
-        PlaceCoordinates.objects.update_or_create(
-            address=address,
-            defaults={'lat': lat, 'lon': lon}
-        )
-        return coordinates
-    except requests.RequestException as e:
-        PlaceCoordinates.objects.update_or_create(
-            address=address,
-            defaults={'lat': None, 'lon': None}
+def get_coordinates_many(addresses, fetch_missing=True, with_status=False):
+    normalized_addresses = {address: normalize_address(address) for address in addresses if address}
+    addresses = {address for address in normalized_addresses.values() if address}
+    places = dict.fromkeys(addresses, (None, None))
+
+    cached_places = coordinates_cache.get_many(addresses)
+    places.update(cached_places)
+    uncached_addresses = addresses - cached_places.keys()
+
+    saved_places = {}
+    if uncached_addresses:
+        for place in PlaceCoordinates.objects.filter(address__in=uncached_addresses):
+            saved_places[place.address] = place
+            places[place.address] = (place.coordinates, place.status)
+        coordinates_cache.set_many(
+            place for place in saved_places.values() if not place.is_expired()
         )
+
+    if fetch_missing and settings.YANDEX_GEOCODER_API_KEY:
+        addresses_to_fetch = {
+            address for address in uncached_addresses
+            if address not in saved_places or saved_places[address].is_expired()
+        }
+        futures = get_geocoder_client().fetch_many(addresses_to_fetch)
+        for address, future in futures.items():
+            place = saved_places.get(address)
+            try:
+                coords = future.result()
+            except requests.RequestException:
+                if place and place.coordinates:
+                    continue
+                coords, failed = None, True
+            else:
+                failed = False
+
+            place, _ = PlaceCoordinates.objects.update_or_create(
+                address=address,
+                defaults=get_geocoding_result(place, coords, failed),
+            )
+            places[address] = (place.coordinates, place.status)
+            coordinates_cache.set_many([place])
+
+    places = {
+        address: places.get(normalized_address, (None, None))
+        for address, normalized_address in normalized_addresses.items()
+    }
+    if with_status:
+        return places
+    return {address: coords for address, (coords, status) in places.items()}
+
+
+def get_coordinates(address):
+    if not settings.YANDEX_GEOCODER_API_KEY:
         return None
+    return get_coordinates_many([address]).get(address)
 
 
 def calculate_distance(coord1, coord2):
@@ -1,3 +1,226 @@
-from django.test import TestCase
+import csv
+from datetime import datetime, timezone
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from foodcartapp.availability import get_availability_index
+from foodcartapp.catalog import CATALOG_VERSION
+from foodcartapp.models import Order, OrderProduct, OrderQuerySet, Product, Restaurant, RestaurantMenuItem
+from restaurateur.views import ORDERS_POLL_WAITERS_KEY
+from star_burger.versions import get_version
+
+
+def disable_geocoding(test_case):
+    for target in ('foodcartapp.models.enqueue_address', 'foodcartapp.signals.enqueue_address'):
+        patcher = mock.patch(target)
+        patcher.start()
+        test_case.addCleanup(patcher.stop)
+
+
+class ExportOrdersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', password='password', is_staff=True)
+        product = Product.objects.create(name='Бургер', price=100, image='burger.jpg')
+        for day, status in ((1, Order.Status.COMPLETED), (2, Order.Status.UNPROCESSED), (3, Order.Status.COMPLETED)):
+            order = Order.objects.create(
+                firstname='Иван',
+                phonenumber='+79001234567',
+                address='Москва, ул. Тверская, 5',
+                status=status,
+                registered_at=datetime(2024, 3, day, 12, tzinfo=timezone.utc),
+            )
+            OrderProduct.objects.create(order=order, product=product, quantity=day, fixed_price=100)
+
+    def export(self, **params):
+        return self.client.get(reverse('restaurateur:export_orders'), params)
+
+    def test_export_is_staff_only(self):
+        response = self.export()
+        self.assertEqual(response.status_code, 302)
+
+    def test_export_is_streamed_and_filtered(self):
+        self.client.force_login(self.manager)
+        response = self.export(**{'from': '2024-03-01', 'to': '2024-03-02', 'status': Order.Status.COMPLETED})
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['X-Accel-Buffering'], 'no')
+        rows = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual([row['quantity'] for row in rows], ['1'])
+
+    def test_invalid_date_is_rejected(self):
+        self.client.force_login(self.manager)
+        self.assertEqual(self.export(**{'from': '2024-02-30'}).status_code, 400)
+
+
+class UpdateProductsAvailabilityTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', password='password', is_staff=True)
+        cls.product = Product.objects.create(name='Бургер', price=100, image='burger.jpg')
+        cls.restaurants = [
+            Restaurant.objects.create(name=f'Ресторан {number}', address=f'Москва, ул. Ленина, {number}')
+            for number in range(5)
+        ]
+        RestaurantMenuItem.objects.bulk_create(
+            RestaurantMenuItem(restaurant=restaurant, product=cls.product)
+            for restaurant in cls.restaurants[:3]
+        )
+
+    def update_availability(self, changes):
+        return self.client.post(
+            reverse('restaurateur:update_products_availability'),
+            {'changes': changes},
+            content_type='application/json',
+        )
+
+    def test_row_is_updated_in_one_request(self):
+        self.client.force_login(self.manager)
+        changes = [
+            {'product': self.product.id, 'restaurant': restaurant.id, 'available': False}
+            for restaurant in self.restaurants
+        ]
+        changes[-1]['available'] = True
+        catalog_version = get_version(CATALOG_VERSION)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.update_availability(changes)
+
+        self.assertEqual(response.json(), {'updated': 4})
+        self.assertEqual(
+            set(RestaurantMenuItem.objects.filter(availability=True).values_list('restaurant_id', flat=True)),
+            {self.restaurants[-1].id},
+        )
+        self.assertNotEqual(get_version(CATALOG_VERSION), catalog_version)
+        self.assertEqual(get_availability_index().get_restaurant_ids([self.product.id]), {self.restaurants[-1].id})
+
+    def test_non_boolean_availability_is_rejected(self):
+        self.client.force_login(self.manager)
+        for available in ('false', '0', 0, None):
+            with self.subTest(available=available):
+                response = self.update_availability([
+                    {'product': self.product.id, 'restaurant': self.restaurants[4].id, 'available': available},
+                ])
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(RestaurantMenuItem.objects.filter(restaurant=self.restaurants[4]).exists())
+
+    def test_unknown_restaurant_is_rejected(self):
+        self.client.force_login(self.manager)
+        response = self.update_availability([{'product': self.product.id, 'restaurant': 0, 'available': True}])
+        self.assertEqual(response.status_code, 400)
+
+
+class FragmentCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', password='password', is_staff=True)
+        cls.restaurant = Restaurant.objects.create(name='Star Burger Арбат', address='Москва, ул. Арбат, 1')
+
+    def setUp(self):
+        cache.clear()
+        disable_geocoding(self)
+        self.client.force_login(self.manager)
+
+    def test_restaurant_rows_are_invalidated_on_save(self):
+        url = reverse('restaurateur:RestaurantView')
+        self.assertContains(self.client.get(url), 'Star Burger Арбат')
+
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.restaurant.name = 'Star Burger Тверская'
+            self.restaurant.save()
+        self.assertContains(self.client.get(url), 'Star Burger Тверская')
+
+    def test_order_restaurants_are_computed_on_miss_only(self):
+        product = Product.objects.create(name='Бургер', price=100, image='burger.jpg')
+        order = Order.objects.create(firstname='Иван', phonenumber='+79001234567', address='Москва, ул. Тверская, 5')
+        OrderProduct.objects.create(order=order, product=product, quantity=1, fixed_price=100)
+        url = reverse('restaurateur:view_orders')
+
+        with mock.patch.object(
+            OrderQuerySet, 'with_available_restaurants',
+            autospec=True, side_effect=OrderQuerySet.with_available_restaurants,
+        ) as compute:
+            self.client.get(url)
+            self.assertContains(self.client.get(url), 'Ошибка определения координат')
+            self.assertEqual(compute.call_count, 1)
+
+            Order.objects.create(
+                firstname='Анна', phonenumber='+79001234568', address='Москва, ул. Арбат, 1',
+                status=Order.Status.PROCESSING, cooking_restaurant=self.restaurant,
+            )
+            self.client.get(url)
+            self.assertEqual(compute.call_count, 1)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                RestaurantMenuItem.objects.create(restaurant=self.restaurant, product=product)
+            response = self.client.get(url)
+            self.assertContains(response, 'Может приготовить: 1')
+            self.assertContains(response, 'в работе: 1')
+            self.assertEqual(compute.call_count, 2)
+
+
+class PollOrdersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', password='password', is_staff=True)
+        cls.orders = [
+            Order.objects.create(firstname='Иван', phonenumber='+79001234567', address=address, status=status)
+            for address, status in (
+                ('Москва, ул. Тверская, 5', Order.Status.UNPROCESSED),
+                ('Москва, ул. Арбат, 10', Order.Status.COMPLETED),
+            )
+        ]
+        cls.updated_at = datetime(2024, 3, 1, 12, tzinfo=timezone.utc)
+        Order.objects.update(updated_at=cls.updated_at)
+
+    def setUp(self):
+        cache.clear()
+        disable_geocoding(self)
+        self.client.force_login(self.manager)
+
+    def poll(self, after, after_id=0):
+        return self.client.get(reverse('restaurateur:poll_orders'), {'after': f'{after.timestamp()}_{after_id}'})
+
+    def test_changed_orders_are_returned_at_once(self):
+        with mock.patch('restaurateur.views.time.sleep') as sleep:
+            response = self.poll(datetime(2024, 3, 1, 11, tzinfo=timezone.utc))
+        sleep.assert_not_called()
+        self.assertEqual(response['Cache-Control'], 'max-age=0, no-cache, no-store, must-revalidate, private')
+
+        data = response.json()
+        active_event, completed_event = data['orders']
+        self.assertEqual(active_event['id'], self.orders[0].id)
+        position = f'{self.orders[0].registered_at.timestamp()}_{self.orders[0].id}'
+        self.assertEqual(active_event['position'], position)
+        self.assertIn(f'data-position="{position}"', active_event['html'])
+        self.assertIn('Москва, ул. Тверская, 5', active_event['html'])
+        self.assertEqual(completed_event, {'id': self.orders[1].id, 'active': False})
+        self.assertEqual(data['cursor'], f'{self.updated_at.timestamp()}_{self.orders[1].id}')
+
+    @mock.patch('restaurateur.views.ORDERS_POLL_TIMEOUT', 0)
+    def test_empty_response_after_timeout(self):
+        cursor = f'{self.updated_at.timestamp()}_{self.orders[1].id}'
+        response = self.poll(self.updated_at, self.orders[1].id)
+        self.assertEqual(response.json(), {'cursor': cursor, 'orders': []})
+
+    @override_settings(ORDERS_POLL_MAX_WAITERS=1)
+    def test_poll_does_not_wait_when_slots_are_taken(self):
+        cache.set(ORDERS_POLL_WAITERS_KEY, 1)
+        with mock.patch('restaurateur.views.time.sleep') as sleep:
+            response = self.poll(self.updated_at, self.orders[1].id)
+        sleep.assert_not_called()
+        self.assertEqual(response.json()['orders'], [])
+        self.assertEqual(cache.get(ORDERS_POLL_WAITERS_KEY), 1)
+
+    @mock.patch('restaurateur.views.ORDERS_POLL_INTERVAL', 0)
+    @mock.patch('restaurateur.views.ORDERS_POLL_TIMEOUT', 0.01)
+    def test_slot_is_returned_after_waiting(self):
+        self.poll(self.updated_at, self.orders[1].id)
+        self.assertEqual(cache.get(ORDERS_POLL_WAITERS_KEY), 0)
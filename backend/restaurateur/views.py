@@ -1,15 +1,42 @@
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
 from django import forms
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
 from django.views import View
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_POST
 from django.urls import reverse_lazy
 from django.contrib.auth.decorators import user_passes_test
 
 from django.contrib.auth import authenticate, login
+from django.core.cache import cache
 from django.contrib.auth import views as auth_views
 from django.db.models import F, Sum
+from django.utils.dateparse import parse_date
 
+from foodcartapp.availability import AVAILABILITY_VERSION, RESTAURANTS_VERSION, update_menu_availability
+from foodcartapp.catalog import CATALOG_VERSION
+from foodcartapp.dispatch import get_restaurant_loads, suggest_restaurants
+from foodcartapp.exports import EXPORT_FORMATS, get_orders_for_export, iter_export
 from foodcartapp.models import Product, Restaurant, Order
 from foodcartapp.serializers import OrderSerializer
+from geocoordinates.cache import COORDINATES_VERSION
+from star_burger.versions import get_version
+
+
+ORDERS_PAGE_SIZE = 50
+ORDER_RESTAURANTS_CACHE_TIMEOUT = 60 * 60
+ORDERS_POLL_TIMEOUT = 20
+ORDERS_POLL_INTERVAL = 2
+ORDERS_POLL_LAG = timedelta(seconds=2)
+ORDERS_POLL_BATCH_SIZE = 100
+ORDERS_POLL_WAITERS_KEY = 'orders_poll:waiters'
 
 
 class Login(forms.Form):
@@ -64,36 +91,254 @@ def is_manager(user):
     return user.is_staff  # FIXME replace with specific permission
 
 
-@user_passes_test(is_manager, login_url='restaurateur:login')
-def view_products(request):
-    restaurants = list(Restaurant.objects.order_by('name'))
+def get_products_with_restaurant_availability(restaurants):
     products = list(Product.objects.prefetch_related('menu_items'))
 
     products_with_restaurant_availability = []
     for product in products:
         availability = {item.restaurant_id: item.availability for item in product.menu_items.all()}
-        ordered_availability = [availability.get(restaurant.id, False) for restaurant in restaurants]
+        ordered_availability = [(restaurant, availability.get(restaurant.id, False)) for restaurant in restaurants]
 
         products_with_restaurant_availability.append(
             (product, ordered_availability)
         )
+    return products_with_restaurant_availability
+
+
+def get_versions(*names):
+    return {name: get_version(name) for name in names}
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def view_products(request):
+    restaurants = Restaurant.objects.order_by('name')
 
     return render(request, template_name="products_list.html", context={
-        'products_with_restaurant_availability': products_with_restaurant_availability,
+        'products_with_restaurant_availability': lambda: get_products_with_restaurant_availability(restaurants),
         'restaurants': restaurants,
+        'versions': get_versions(CATALOG_VERSION, AVAILABILITY_VERSION, RESTAURANTS_VERSION),
     })
 
 
+def parse_availability_changes(body):
+    changes = json.loads(body)['changes']
+    parsed_changes = []
+    for change in changes:
+        if not isinstance(change['available'], bool):
+            raise ValueError('available должно быть true или false')
+        parsed_changes.append((int(change['product']), int(change['restaurant']), change['available']))
+    return parsed_changes
+
+
+@require_POST
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def update_products_availability(request):
+    try:
+        changes = parse_availability_changes(request.body)
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Некорректный список изменений'}, status=400)
+
+    try:
+        updated = update_menu_availability(changes)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    return JsonResponse({'updated': updated})
+
+
 @user_passes_test(is_manager, login_url='restaurateur:login')
 def view_restaurants(request):
     return render(request, template_name="restaurants_list.html", context={
         'restaurants': Restaurant.objects.all(),
+        'versions': get_versions(RESTAURANTS_VERSION),
     })
 
 
+def parse_orders_cursor(cursor):
+    try:
+        timestamp, order_id = cursor.split('_')
+        return datetime.fromtimestamp(float(timestamp), tz=timezone.utc), int(order_id)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def make_orders_cursor(order):
+    return f'{order.registered_at.timestamp()}_{order.id}'
+
+
 @user_passes_test(is_manager, login_url='restaurateur:login')
 def view_orders(request):
-    orders = Order.objects.with_total_price().with_available_restaurants()
+    poll_cursor = f'{(datetime.now(timezone.utc) - ORDERS_POLL_LAG).timestamp()}_0'
+    orders = (
+        Order.objects
+        .active()
+        .select_related('cooking_restaurant')
+        .order_by('registered_at', 'id')
+    )
+    cursor = parse_orders_cursor(request.GET.get('after'))
+    if cursor:
+        orders = orders.registered_after(*cursor)
+
+    orders = list(orders[:ORDERS_PAGE_SIZE + 1])
+    next_cursor = None
+    if len(orders) > ORDERS_PAGE_SIZE:
+        orders = orders[:ORDERS_PAGE_SIZE]
+        next_cursor = make_orders_cursor(orders[-1])
+    attach_order_restaurants(orders)
+
     return render(request, template_name='order_items.html', context={
         'order_items': orders,
+        'next_cursor': next_cursor,
+        'is_first_page': not cursor,
+        'page_start': f'{cursor[0].timestamp()}_{cursor[1]}' if cursor else None,
+        'poll_cursor': poll_cursor,
+        'poll_interval_ms': ORDERS_POLL_INTERVAL * 1000,
     })
+
+
+def get_order_restaurants_cache_key(order, versions):
+    vary_on = [order.id, order.updated_at.timestamp(), *versions.values()]
+    return 'order_restaurants:' + ':'.join(map(str, vary_on))
+
+
+def attach_order_restaurants(orders):
+    orders = [order for order in orders if not order.cooking_restaurant_id]
+    if not orders:
+        return
+
+    # В кеше лежат только кандидаты с расстояниями: загрузка ресторанов меняется
+    # при каждом назначении, поэтому ранжируем по ней заново на каждый запрос.
+    versions = get_versions(AVAILABILITY_VERSION, RESTAURANTS_VERSION, COORDINATES_VERSION)
+    keys = {order.id: get_order_restaurants_cache_key(order, versions) for order in orders}
+    cached = cache.get_many(keys.values())
+
+    missing_ids = [order.id for order in orders if keys[order.id] not in cached]
+    if missing_ids:
+        computed = {
+            keys[order.id]: order.available_restaurants
+            for order in Order.objects.filter(id__in=missing_ids).with_available_restaurants()
+        }
+        cache.set_many(computed, ORDER_RESTAURANTS_CACHE_TIMEOUT)
+        cached.update(computed)
+
+    for order in orders:
+        order.available_restaurants = cached.get(keys[order.id], [])
+    suggest_restaurants(orders, get_restaurant_loads())
+
+
+def get_order_changes(cursor):
+    return list(
+        Order.objects
+        .filter(updated_at__lte=datetime.now(timezone.utc) - ORDERS_POLL_LAG)
+        .updated_after(*cursor)
+        .order_by('updated_at', 'id')
+        .values_list('id', 'updated_at')[:ORDERS_POLL_BATCH_SIZE]
+    )
+
+
+def release_poll_slot():
+    try:
+        cache.decr(ORDERS_POLL_WAITERS_KEY)
+    except ValueError:
+        pass
+
+
+def take_poll_slot():
+    # Счётчик живёт в общем кеше, чтобы ограничение действовало на все процессы.
+    # Ключ истекает сам, если процесс упал, не вернув место.
+    cache.add(ORDERS_POLL_WAITERS_KEY, 0, ORDERS_POLL_TIMEOUT * 3)
+    try:
+        waiters = cache.incr(ORDERS_POLL_WAITERS_KEY)
+    except ValueError:
+        return False
+    if waiters > settings.ORDERS_POLL_MAX_WAITERS:
+        release_poll_slot()
+        return False
+    return True
+
+
+def wait_for_order_changes(cursor):
+    changes = get_order_changes(cursor)
+    if changes or not take_poll_slot():
+        return changes
+
+    try:
+        deadline = time.monotonic() + ORDERS_POLL_TIMEOUT
+        while not changes and time.monotonic() < deadline:
+            # Не держим соединение с базой, пока ждём изменений
+            if not connection.in_atomic_block:
+                connection.close()
+            time.sleep(ORDERS_POLL_INTERVAL)
+            changes = get_order_changes(cursor)
+    finally:
+        release_poll_slot()
+    return changes
+
+
+@never_cache
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def poll_orders(request):
+    cursor = (
+        parse_orders_cursor(request.GET.get('after'))
+        or (datetime.now(timezone.utc) - ORDERS_POLL_LAG, 0)
+    )
+    changes = wait_for_order_changes(cursor)
+
+    orders = list(
+        Order.objects
+        .filter(id__in=[order_id for order_id, _ in changes])
+        .active()
+        .select_related('cooking_restaurant')
+    )
+    attach_order_restaurants(orders)
+    orders = {order.id: order for order in orders}
+
+    events = []
+    for order_id, updated_at in changes:
+        event = {'id': order_id, 'active': order_id in orders}
+        if event['active']:
+            event['position'] = make_orders_cursor(orders[order_id])
+            event['html'] = render_to_string('order_item_row.html', {'item': orders[order_id]}, request=request)
+        events.append(event)
+        cursor = (updated_at, order_id)
+
+    return JsonResponse({
+        'cursor': f'{cursor[0].timestamp()}_{cursor[1]}',
+        'orders': events,
+    })
+
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def export_orders(request):
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest('Неизвестный формат выгрузки')
+
+    dates = {}
+    for param in ('from', 'to'):
+        value = request.GET.get(param)
+        try:
+            dates[param] = parse_date(value) if value else None
+        except ValueError:
+            dates[param] = None
+        if value and not dates[param]:
+            return HttpResponseBadRequest(f'Некорректная дата в параметре {param}')
+
+    statuses = request.GET.getlist('status')
+    if set(statuses) - set(Order.Status.values):
+        return HttpResponseBadRequest('Неизвестный статус заказа')
+
+    orders = get_orders_for_export(dates['from'], dates['to'], statuses)
+    response = StreamingHttpResponse(
+        iter_export(orders, export_format),
+        content_type=EXPORT_CONTENT_TYPES[export_format],
+    )
+    filename = f'orders-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{export_format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 from email.policy import default
 
 import dj_database_url
@@ -16,6 +17,21 @@ environ.Env.read_env(os.path.join(BASE_DIR, '.env'))
 
 SECRET_KEY = env('SECRET_KEY')
 YANDEX_GEOCODER_API_KEY=env('YANDEX_GEOCODER_API_KEY')
+GEOCODER_URL = env('GEOCODER_URL', default='https://geocode-maps.yandex.ru/1.x')
+GEOCODER_MAX_WORKERS = env.int('GEOCODER_MAX_WORKERS', default=4)
+GEOCODER_TIMEOUT = env.float('GEOCODER_TIMEOUT', default=5)
+GEOCODER_RETRIES = env.int('GEOCODER_RETRIES', default=2)
+GEOCODER_RATE_LIMIT = env.float('GEOCODER_RATE_LIMIT', default=10)
+GEOCODER_CACHE_SIZE = env.int('GEOCODER_CACHE_SIZE', default=1024)
+GEOCODER_CACHE_TTL = env.int('GEOCODER_CACHE_TTL', default=60 * 60)
+GEOCODER_RETRY_DELAY = timedelta(minutes=env.int('GEOCODER_RETRY_DELAY_MINUTES', default=10))
+GEOCODER_RETRY_MAX_DELAY = timedelta(minutes=env.int('GEOCODER_RETRY_MAX_DELAY_MINUTES', default=7 * 24 * 60))
+DISTANCE_EXACT_TOP_K = env.int('DISTANCE_EXACT_TOP_K', default=3)
+DISPATCH_LOAD_WEIGHT = env.float('DISPATCH_LOAD_WEIGHT', default=1.0)
+DISPATCH_MAX_DISTANCE = env.float('DISPATCH_MAX_DISTANCE', default=15.0)
+IDEMPOTENCY_KEY_TTL = timedelta(hours=env.int('IDEMPOTENCY_KEY_TTL_HOURS', default=24))
+ORDER_INTAKE_ASYNC = env.bool('ORDER_INTAKE_ASYNC', default=False)
+ORDERS_POLL_MAX_WAITERS = env.int('ORDERS_POLL_MAX_WAITERS', default=4)
 DEBUG = env.bool('DEBUG', True)
 
 ALLOWED_HOSTS = env.list('ALLOWED_HOSTS', default=['127.0.0.1', 'localhost'])
@@ -101,6 +117,10 @@ DATABASES = {
     'default': env.db('DATABASE_URL')
 }
 
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://')
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
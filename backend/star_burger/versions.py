@@ -0,0 +1,27 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def get_version_key(name):
+    return f'version:{name}'
+
+
+def get_version(name):
+    key = get_version_key(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    version = time.time()
+    cache.set(get_version_key(name), version, timeout=None)
+    return version
+
+
+def bump_version_on_commit(name):
+    transaction.on_commit(lambda: bump_version(name))
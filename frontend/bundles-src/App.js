@@ -13,6 +13,8 @@ import NoResults from "./components/NoResults";
 
 import './css/App.css';
 
+const CATALOG_STORAGE_KEY = 'star-burger-catalog';
+
 class App extends Component {
 
   constructor(props){
@@ -101,8 +103,36 @@ class App extends Component {
   }
 
 
+  loadCachedCatalog(){
+    try {
+      return JSON.parse(localStorage.getItem(CATALOG_STORAGE_KEY));
+    } catch(error){
+      return null;
+    }
+  }
+
+  saveCachedCatalog(catalog){
+    try {
+      localStorage.setItem(CATALOG_STORAGE_KEY, JSON.stringify(catalog));
+    } catch(error){
+      // Storage may be full or disabled, the catalog will be downloaded next time
+    }
+  }
+
   async getProducts(){
-    let response = await fetch('/api/products/', {
+    let catalog = this.loadCachedCatalog();
+    if (catalog){
+      this.setState({
+        products: catalog.products
+      });
+    }
+
+    let url = '/api/products/changes/';
+    if (catalog && catalog.version){
+      url += `?since=${encodeURIComponent(catalog.version)}`;
+    }
+
+    let response = await fetch(url, {
       headers: {
         'Accept': 'application/json',
         'Content-Type': 'application/json',
@@ -113,9 +143,23 @@ class App extends Component {
       return;
     }
 
-    let data = await response.json();
+    let changes = await response.json();
+    let products = changes.full || !catalog ? [] : catalog.products;
+    let changedIds = new Set([
+      ...changes.removed,
+      ...changes.products.map(product => product.id),
+    ]);
+    products = products
+      .filter(product => !changedIds.has(product.id))
+      .concat(changes.products);
+    products = _.sortBy(products, 'id');
+
+    this.saveCachedCatalog({
+      version: changes.version,
+      products: products,
+    });
     this.setState({
-      products : data
+      products : products
     });
   }
 